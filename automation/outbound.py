@@ -0,0 +1,89 @@
+# ============================================================
+# Outbound message scheduler for the Telegram bot
+# Per-chat + global token buckets and RetryAfter backoff, so
+# long outputs and many chats don't run into flood control.
+# ============================================================
+
+import time
+import asyncio
+import datetime
+from collections import OrderedDict
+
+from telegram.error import RetryAfter
+
+
+class AsyncTokenBucket:
+    """`rate` sends per second, bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+            # No await between the check and the decrement: safe on one loop
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class OutboundScheduler:
+    MAX_TRACKED_CHATS = 10000
+
+    def __init__(self, global_rate=25, chat_rate=1.0, chat_burst=3, max_retries=3):
+        self.global_bucket = AsyncTokenBucket(global_rate, capacity=global_rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+
+        self._chat_buckets = OrderedDict()   # chat_id -> bucket (LRU)
+        self._paused_until = 0.0              # global pause after RetryAfter
+
+    def _chat_bucket(self, chat_id):
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = AsyncTokenBucket(self.chat_rate, capacity=self.chat_burst)
+            self._chat_buckets[chat_id] = bucket
+            while len(self._chat_buckets) > self.MAX_TRACKED_CHATS:
+                self._chat_buckets.popitem(last=False)
+        else:
+            self._chat_buckets.move_to_end(chat_id)
+        return bucket
+
+    @staticmethod
+    def _retry_delay(error):
+        delay = error.retry_after
+        if isinstance(delay, datetime.timedelta):
+            delay = delay.total_seconds()
+        return float(delay)
+
+    # ---------------------------------------------------------
+    # Send (or edit) through the buckets, retrying on RetryAfter
+    # ---------------------------------------------------------
+    async def send(self, chat_id, send_func, *args, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+
+            await self._chat_bucket(chat_id).acquire()
+            await self.global_bucket.acquire()
+
+            try:
+                return await send_func(*args, **kwargs)
+
+            except RetryAfter as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self._retry_delay(e)
+                print(f"[BOT] Flood control: waiting {delay:.0f}s (chat {chat_id})")
+                # Telegram asks us to slow down: pause every sender
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
@@ -6,8 +6,14 @@
 
 import os
 import sys
+import html
 import json
+import time
+import asyncio
 import datetime
+import uuid
+import functools
+from collections import defaultdict, OrderedDict
 from dotenv import load_dotenv
 
 # -----------------------------------------------------------
@@ -23,11 +29,15 @@ if ROOT_DIR not in sys.path:
 
 # Now imports from src will work
 from src.pipeline import ContentPipeline
+from src.metrics import metrics
+from src.job_queue import JobQueue
+from automation.outbound import OutboundScheduler
 
 # -----------------------------------------------------------
 # Telegram imports
 # -----------------------------------------------------------
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import BadRequest
 from telegram.ext import (
     Application,
     CommandHandler,
@@ -64,6 +74,36 @@ if SRC_DIR not in sys.path:
 # -----------------------------------------------------------
 pipeline = ContentPipeline(use_api=True)
 
+# Job queue (JOB_QUEUE=true): generations run in automation/worker.py
+# processes instead of this one; None = run them here.
+job_queue = JobQueue.from_env()
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "0.5"))
+
+# -----------------------------------------------------------
+# Generation concurrency limits
+# Generations run in worker threads so the polling loop keeps
+# serving other chats; these caps keep one chat (or a spike)
+# from starving everybody else.
+# -----------------------------------------------------------
+MAX_JOBS_PER_CHAT = int(os.getenv("BOT_MAX_JOBS_PER_CHAT", "1"))
+MAX_CONCURRENT_JOBS = int(os.getenv("BOT_MAX_CONCURRENT_JOBS", "16"))
+
+generation_slots = asyncio.Semaphore(MAX_CONCURRENT_JOBS)
+running_jobs = defaultdict(int)   # chat_id -> jobs in flight
+
+# Seconds between two edits of a streaming answer (Telegram edit limits)
+STREAM_EDIT_INTERVAL = float(os.getenv("BOT_STREAM_EDIT_INTERVAL", "1.0"))
+
+# -----------------------------------------------------------
+# Outbound scheduler: every bulk send / edit goes through it
+# (Telegram: ~30 msg/s overall, ~1 msg/s per chat)
+# -----------------------------------------------------------
+outbox = OutboundScheduler(
+    global_rate=float(os.getenv("BOT_SEND_RATE_GLOBAL", "25")),
+    chat_rate=float(os.getenv("BOT_SEND_RATE_PER_CHAT", "1")),
+    chat_burst=int(os.getenv("BOT_SEND_BURST_PER_CHAT", "3")),
+)
+
 
 # -----------------------------------------------------------
 # HELPER: Back to menu button
@@ -75,57 +115,312 @@ def back_to_menu_button():
 
 
 # -----------------------------------------------------------
-# Helper: Send long messages without Telegram cutoff
+# Helper: reply function for both messages and button clicks
+# -----------------------------------------------------------
+def get_reply_func(update: Update):
+    if update.message:
+        return update.message.reply_text
+    return update.callback_query.message.reply_text
+
+
+# -----------------------------------------------------------
+# Helper: run a blocking pipeline call off the event loop
+# Returns None (after telling the user) if the chat is busy.
 # -----------------------------------------------------------
-async def send_long_message(update: Update, text: str):
+async def run_generation(update: Update, func, *args, notify=True):
+    chat_id = update.effective_chat.id
+
+    if running_jobs[chat_id] >= MAX_JOBS_PER_CHAT:
+        await outbox.send(
+            chat_id, get_reply_func(update),
+            "⏳ A generation is already running for this chat, please wait…",
+        )
+        return None
+
+    running_jobs[chat_id] += 1
+    try:
+        if notify:
+            await outbox.send(chat_id, get_reply_func(update), "⏳ Generating…")
+        async with generation_slots:
+            results = await asyncio.to_thread(func, *args)
+
+        # Kept in this chat's own history ("Last results", paging)
+        if results:
+            await asyncio.to_thread(pipeline.remember_for_chat, chat_id, results)
+        return results
+    finally:
+        running_jobs[chat_id] -= 1
+        if running_jobs[chat_id] <= 0:
+            del running_jobs[chat_id]
+
+
+# -----------------------------------------------------------
+# Helper: pipeline job → callable for run_generation
+# On the queue workers when JOB_QUEUE=true, otherwise here.
+# -----------------------------------------------------------
+def run_queued(kind, **payload):
+    job_id = job_queue.enqueue(kind, payload)
+    # Bounded by JOB_WAIT_TIMEOUT: without workers the chat would wait forever
+    job = job_queue.wait_or_cancel(job_id, poll_interval=JOB_POLL_INTERVAL)
+    if job is not None and job["status"] == "done":
+        return job["result"]
+
+    message = (job["error"] if job is not None else None) or "job failed"
+    return [{
+        "prompt": payload.get("prompt", kind),
+        "generated_text": "",
+        "flagged": False,
+        "flagged_words": [],
+        "error": {"type": "job", "message": message},
+    }]
+
+
+def job_func(kind, **payload):
+    if job_queue is not None:
+        return functools.partial(run_queued, kind, **payload)
+    if kind == "default":
+        return pipeline.run
+    if kind == "batch_csv":
+        return pipeline.run_batch_csv
+    return functools.partial(pipeline.process_single, payload["prompt"])
+
+
+# -----------------------------------------------------------
+# Streaming reply: one placeholder message edited as tokens
+# arrive (at most every STREAM_EDIT_INTERVAL seconds); past
+# 4000 chars the text continues in a new message.
+# -----------------------------------------------------------
+class StreamingReply:
     MAX = 4000
 
-    if update.message:
-        send_func = update.message.reply_text
-    else:
-        send_func = update.callback_query.message.reply_text
-
-    # If short enough, send once
-    if len(text) <= MAX:
-        await send_func(text, parse_mode="Markdown")
-        await send_func("⬅️ Back to menu", reply_markup=back_to_menu_button(), parse_mode="Markdown")
-        return
+    def __init__(self, update: Update, interval=STREAM_EDIT_INTERVAL):
+        self.send_func = get_reply_func(update)
+        self.chat_id = update.effective_chat.id
+        self.interval = interval
+        self.message = None
+        self.text = ""          # text of the current (last) message
+        self.shown = ""         # what Telegram currently displays
+        self.last_edit = 0.0
+
+    async def _edit(self, text):
+        if text == self.shown:
+            return
+        try:
+            await outbox.send(self.chat_id, self.message.edit_text, text)
+        except BadRequest:
+            # e.g. "message is not modified" -> nothing to do
+            pass
+        self.shown = text
+        self.last_edit = time.monotonic()
+
+    async def _render(self):
+        if self.message is None:
+            self.message = await outbox.send(self.chat_id, self.send_func, "✍️ …")
+
+        # Full message: freeze it and continue in a new one
+        while len(self.text) > self.MAX:
+            cut = self.text.rfind("\n", 0, self.MAX)
+            if cut <= 0:
+                cut = self.MAX
+            await self._edit(self.text[:cut])
+            self.text = self.text[cut:].lstrip("\n")
+            self.message = await outbox.send(self.chat_id, self.send_func, self.text[:self.MAX] or "…")
+            self.shown = self.text[:self.MAX] or "…"
+
+        await self._edit(self.text or "…")
+
+    async def push(self, delta: str):
+        self.text += delta
+        if self.message is None or time.monotonic() - self.last_edit >= self.interval:
+            await self._render()
+
+    async def finish(self):
+        await self._render()
 
-    # Split long messages
-    parts = text.split("\n")
-    chunk = ""
 
-    for line in parts:
-        if len(chunk) + len(line) + 1 > MAX:
-            await send_func(chunk, parse_mode="Markdown")
-            chunk = line + "\n"
-        else:
-            chunk += line + "\n"
+# -----------------------------------------------------------
+# Run one prompt with streaming output in the chat
+# -----------------------------------------------------------
+async def stream_generation(update: Update, prompt: str):
+    loop = asyncio.get_running_loop()
+    deltas = asyncio.Queue()
 
-    if chunk.strip():
-        await send_func(chunk, parse_mode="Markdown")
+    # Called from the worker thread for every chunk
+    def on_delta(delta):
+        loop.call_soon_threadsafe(deltas.put_nowait, delta)
 
-    # Send Back to Menu button after the last chunk
-    await send_func("⬅️ Back to menu", reply_markup=back_to_menu_button(), parse_mode="Markdown")
+    job = asyncio.create_task(
+        run_generation(update, pipeline.process_single, prompt, on_delta, notify=False)
+    )
+    job.add_done_callback(lambda _: deltas.put_nowait(None))
+
+    reply = StreamingReply(update)
+    while True:
+        delta = await deltas.get()
+        if delta is None:
+            break
+        await reply.push(delta)
+
+    results = await job
+    if results is not None:
+        await reply.finish()
+    return results
 
 
 # -----------------------------------------------------------
 # Format results nicely for Telegram
 # -----------------------------------------------------------
-def format_results(results):
-    out = "📄 *Last results:*\n\n"
-    for r in results:
-        snippet = r["generated_text"][:3000]
-        if len(r["generated_text"]) > 3000:
-            snippet += "..."
+def _html(text, limit):
+    """HTML-escaped text cut to `limit` chars (never inside an &entity;)."""
+    text = html.escape(str(text), quote=False)
+    if len(text) <= limit:
+        return text
+
+    cut = text[:max(0, limit - 1)]
+    amp = cut.rfind("&")
+    if amp != -1 and ";" not in cut[amp:]:
+        cut = cut[:amp]
+    return cut + "…"
+
+
+def format_result(r, max_chars=3000):
+    """One result in at most ~max_chars; the answer gets what the rest leaves."""
+    lines = [f"• <b>{_html(r['prompt'], 200)}</b>"]
+
+    if r.get("error"):
+        lines.append(f"❌ Error ({r['error']['type']}): {_html(r['error']['message'], 200)}")
+
+    if r["flagged"]:
+        lines.append(f"⚠️ Flagged: {_html(', '.join(r['flagged_words']), 200)}")
 
-        out += f"• *{r['prompt']}*\n→ {snippet}\n"
+    used = sum(len(line) + 1 for line in lines) + 2
+    lines.insert(1, f"→ {_html(r['generated_text'], max(0, max_chars - used))}")
+    return "\n".join(lines) + "\n"
 
-        if r["flagged"]:
-            out += f"⚠️ Flagged: {', '.join(r['flagged_words'])}\n"
 
-        out += "\n"
-    return out
+def format_results(results, title="📄 <b>Last results:</b>", max_chars=3000):
+    return "\n".join([title + "\n"] + [format_result(r, max_chars) for r in results])
+
+
+# -----------------------------------------------------------
+# Paginated results view
+# One message per result set; prev/next buttons carry
+# "page:<run_id>:<page>" and edit that message in place.
+# Result sets and rendered pages are kept in small LRUs, keyed
+# by chat so a chat can only page through its own results.
+# -----------------------------------------------------------
+PAGE_SIZE = int(os.getenv("BOT_PAGE_SIZE", "5"))
+PAGE_TEXT_LIMIT = 3800   # chars of all results on a page (HTML, under Telegram's 4096)
+MAX_RESULT_SETS = 32
+MAX_RENDERED_PAGES = 256
+
+result_sets = OrderedDict()      # (chat_id, run_id) -> results
+rendered_pages = OrderedDict()   # (run_id, page) -> text
+
+
+def remember_results(chat_id, results):
+    run_id = next((r["run_id"] for r in results if r.get("run_id")), None) or uuid.uuid4().hex[:12]
+    result_sets[(chat_id, run_id)] = results
+    result_sets.move_to_end((chat_id, run_id))
+    while len(result_sets) > MAX_RESULT_SETS:
+        result_sets.popitem(last=False)
+    return run_id
+
+
+async def get_result_set(chat_id, run_id):
+    results = result_sets.get((chat_id, run_id))
+    if results is None:
+        # Evicted or bot restarted: read it back from the chat's history
+        # (SQLite + JSON decode in a thread; the LRUs stay on the loop)
+        results = await asyncio.to_thread(pipeline.get_chat_run, chat_id, run_id)
+        if results is not None:
+            remember_results(chat_id, results)
+    return results
+
+
+def page_budgets(page_results, total=PAGE_TEXT_LIMIT):
+    """
+    Chars each result may use: short results keep their full length and
+    what they leave goes to the longer ones (one result gets it all).
+    """
+    full = [len(format_result(r, total)) for r in page_results]
+    budgets = [0] * len(page_results)
+    remaining = total
+    for n, i in enumerate(sorted(range(len(full)), key=full.__getitem__)):
+        budgets[i] = min(full[i], remaining // (len(full) - n))
+        remaining -= budgets[i]
+    return budgets
+
+
+def render_page(run_id, results, page):
+    """Text of one page, rendered once per (run_id, page)."""
+    key = (run_id, page)
+    text = rendered_pages.get(key)
+    if text is not None:
+        rendered_pages.move_to_end(key)
+        return text
+
+    pages = max(1, -(-len(results) // PAGE_SIZE))
+    start = page * PAGE_SIZE
+    title = f"📄 <b>Results {start + 1}–{min(start + PAGE_SIZE, len(results))} of {len(results)}</b> (page {page + 1}/{pages})"
+    # Every result is cut on its own: the page never needs a blind cut
+    page_results = results[start:start + PAGE_SIZE]
+    text = "\n".join([title + "\n"] + [
+        format_result(r, limit) for r, limit in zip(page_results, page_budgets(page_results))
+    ])
+
+    rendered_pages[key] = text
+    while len(rendered_pages) > MAX_RENDERED_PAGES:
+        rendered_pages.popitem(last=False)
+    return text
+
+
+def page_keyboard(run_id, page, total):
+    pages = max(1, -(-total // PAGE_SIZE))
+    nav = []
+    if page > 0:
+        nav.append(InlineKeyboardButton("◀️ Prev", callback_data=f"page:{run_id}:{page - 1}"))
+    if page < pages - 1:
+        nav.append(InlineKeyboardButton("Next ▶️", callback_data=f"page:{run_id}:{page + 1}"))
+
+    rows = [nav] if nav else []
+    rows.append([InlineKeyboardButton("⬅️ Back to menu", callback_data="back_to_menu")])
+    return InlineKeyboardMarkup(rows)
+
+
+async def show_results(update: Update, results):
+    """First page of a result set, as one new message."""
+    run_id = remember_results(update.effective_chat.id, results)
+    await outbox.send(
+        update.effective_chat.id, get_reply_func(update),
+        render_page(run_id, results, 0),
+        parse_mode="HTML",
+        reply_markup=page_keyboard(run_id, 0, len(results)),
+    )
+
+
+async def page_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    _, run_id, page = query.data.split(":")
+    page = int(page)
+
+    results = await get_result_set(update.effective_chat.id, run_id)
+    if results is None:
+        await query.answer("These results are no longer available.", show_alert=True)
+        return
+    await query.answer()
+
+    try:
+        await outbox.send(
+            update.effective_chat.id, query.edit_message_text,
+            render_page(run_id, results, page),
+            parse_mode="HTML",
+            reply_markup=page_keyboard(run_id, page, len(results)),
+        )
+    except BadRequest as e:
+        # Double click: "message is not modified"; anything else is a bug
+        if "not modified" not in str(e):
+            raise
 
 
 # -----------------------------------------------------------
@@ -144,7 +439,8 @@ def get_menu_keyboard():
 # /start command
 # -----------------------------------------------------------
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await update.message.reply_text(
+    await outbox.send(
+        update.effective_chat.id, update.message.reply_text,
         "🔥 *DI Content Pipeline Bot Ready!* 🔥\n"
         "Choose an option:",
         reply_markup=get_menu_keyboard(),
@@ -159,7 +455,8 @@ async def back_to_menu_handler(update: Update, context: ContextTypes.DEFAULT_TYP
     query = update.callback_query
     await query.answer()
 
-    await query.message.reply_text(
+    await outbox.send(
+        update.effective_chat.id, query.message.reply_text,
         "📋 *Main Menu:*",
         reply_markup=get_menu_keyboard(),
         parse_mode="Markdown"
@@ -179,33 +476,39 @@ async def menu_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     # 1) default pipeline
     if choice == "menu_1":
-        results = pipeline.run()
-        txt = format_results(results)
-        await send_long_message(update, txt)
+        results = await run_generation(update, job_func("default"))
+        if results is None:
+            return
+        await show_results(update, results)
         return
 
     # 2) custom prompt
     if choice == "menu_2":
-        await query.edit_message_text("✍️ Send your prompt:")
+        await outbox.send(update.effective_chat.id, query.edit_message_text, "✍️ Send your prompt:")
         context.user_data["awaiting_prompt"] = True
         return
 
     # 3) batch CSV
     if choice == "menu_3":
-        results = pipeline.run_batch_csv()
-        txt = format_results(results)
-        await send_long_message(update, txt)
+        results = await run_generation(update, job_func("batch_csv"))
+        if results is None:
+            return
+        await show_results(update, results)
         return
 
     # 4) last results
     if choice == "menu_4":
-        results = pipeline.get_last_results()
+        # SQLite read + JSON decode: kept off the event loop
+        results = await asyncio.to_thread(
+            pipeline.get_last_results, chat_id=update.effective_chat.id
+        )
         if not results:
-            await query.edit_message_text("❌ No previous results found.")
+            await outbox.send(
+                update.effective_chat.id, query.edit_message_text, "❌ No previous results found."
+            )
             return
 
-        txt = format_results(results)
-        await send_long_message(update, txt)
+        await show_results(update, results)
         return
 
 
@@ -217,13 +520,36 @@ async def text_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         prompt = update.message.text
         context.user_data["awaiting_prompt"] = False
 
-        results = pipeline.process_single(prompt)
-        txt = format_results(results)
-        await send_long_message(update, txt)
+        if job_queue is not None:
+            # Workers can't stream into the chat: wait for the whole answer
+            results = await run_generation(update, job_func("single", prompt=prompt))
+            if results is not None and results[0]["generated_text"]:
+                await outbox.send(
+                    update.effective_chat.id, update.message.reply_text,
+                    results[0]["generated_text"][:StreamingReply.MAX],
+                )
+        else:
+            results = await stream_generation(update, prompt)
+        if results is None:
+            return
+
+        r = results[0]
+        if r.get("error"):
+            status = f"❌ Generation failed ({r['error']['type']}), please try again later."
+        elif r["flagged"]:
+            status = f"⚠️ Flagged: {', '.join(r['flagged_words'])}"
+        else:
+            status = "✅ Done"
+        # Same buckets as the streamed edits it follows
+        await outbox.send(
+            update.effective_chat.id, update.message.reply_text,
+            status, reply_markup=back_to_menu_button(),
+        )
         return
 
     # Otherwise redirect to menu
-    await update.message.reply_text(
+    await outbox.send(
+        update.effective_chat.id, update.message.reply_text,
         "Use the menu below:",
         reply_markup=get_menu_keyboard()
     )
@@ -235,10 +561,22 @@ async def text_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 def main():
     print("🤖 Telegram bot running (clean event loop)…")
 
-    app = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
+    # Optional Prometheus endpoint: http://<host>:METRICS_PORT/metrics
+    metrics_port = os.getenv("METRICS_PORT")
+    if metrics_port:
+        metrics.serve(int(metrics_port))
+
+    # concurrent_updates: handlers of different chats run side by side
+    app = (
+        Application.builder()
+        .token(TELEGRAM_BOT_TOKEN)
+        .concurrent_updates(True)
+        .build()
+    )
 
     app.add_handler(CommandHandler("start", start))
     app.add_handler(CallbackQueryHandler(back_to_menu_handler, pattern="back_to_menu"))
+    app.add_handler(CallbackQueryHandler(page_handler, pattern=r"^page:"))
     app.add_handler(CallbackQueryHandler(menu_handler))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, text_handler))
 
@@ -0,0 +1,135 @@
+# ============================================================
+# Generation workers for the job queue (JOB_QUEUE=true)
+# Each process owns one ContentPipeline, claims jobs from the
+# SQLite queue, runs them and stores the results.
+#
+# Usage:  python automation/worker.py --processes 4
+# ============================================================
+
+import os
+import sys
+import time
+import signal
+import socket
+import argparse
+import threading
+import multiprocessing
+from dotenv import load_dotenv
+
+# /automation/worker.py --> parent = project root
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from src.job_queue import JobQueue
+from src.metrics import metrics
+
+load_dotenv()
+
+
+# -----------------------------------------------------------
+# Job kinds → pipeline calls
+# -----------------------------------------------------------
+def execute(pipeline, job):
+    kind, payload = job["kind"], job["payload"]
+
+    if kind == "single":
+        return pipeline.process_single(payload["prompt"])
+    if kind == "default":
+        return pipeline.run()
+    if kind == "batch_csv":
+        return pipeline.run_batch_csv(payload.get("csv_path", "data/prompts.csv"))
+
+    raise ValueError(f"Unknown job kind: {kind}")
+
+
+# -----------------------------------------------------------
+# Keep the lease alive while a long job runs
+# -----------------------------------------------------------
+def keep_alive(queue, job_id, worker_id, stop):
+    interval = max(1, queue.visibility_timeout / 3)
+    while not stop.wait(interval):
+        if not queue.heartbeat(job_id, worker_id):
+            print(f"[WORKER {worker_id}] Lost the lease on job {job_id}")
+            return
+
+
+def worker_loop(worker_id, poll_interval=1.0):
+    # Imported here: every process builds its own pipeline
+    from src.pipeline import ContentPipeline
+
+    queue = JobQueue.from_env(force=True)
+    pipeline = ContentPipeline(use_api=True)
+    print(f"[WORKER {worker_id}] Waiting for jobs on {queue.path}")
+
+    # SIGTERM unwinds through the finally below (child processes skip atexit)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        while True:
+            job = queue.claim(worker_id)
+            if job is None:
+                time.sleep(poll_interval)
+                continue
+
+            print(f"[WORKER {worker_id}] Job {job['id']} ({job['kind']}, attempt {job['attempts']})")
+            stop = threading.Event()
+            threading.Thread(
+                target=keep_alive, args=(queue, job["id"], worker_id, stop), daemon=True
+            ).start()
+
+            try:
+                with metrics.timer("job"):
+                    results = execute(pipeline, job)
+                queue.complete(job["id"], worker_id, results)
+                metrics.inc("pipeline_jobs_total", status="done")
+            except Exception as e:
+                queue.fail(job["id"], worker_id, e)
+                metrics.inc("pipeline_jobs_total", status="failed")
+                print(f"[WORKER {worker_id}] Job {job['id']} failed: {e}")
+            finally:
+                stop.set()
+    finally:
+        # Buffered Parquet rows of single-prompt jobs
+        pipeline.flush_parquet()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Job queue workers")
+    parser.add_argument(
+        "--processes", type=int,
+        default=int(os.getenv("WORKER_PROCESSES", "1")),
+        help="worker processes to start (WORKER_PROCESSES)",
+    )
+    args = parser.parse_args()
+
+    # Finished jobs older than a week are dropped
+    JobQueue.from_env(force=True).purge()
+
+    prefix = f"{socket.gethostname()}-{os.getpid()}"
+    if args.processes <= 1:
+        worker_loop(f"{prefix}-0")
+        return
+
+    processes = [
+        multiprocessing.Process(target=worker_loop, args=(f"{prefix}-{i}",), daemon=True)
+        for i in range(args.processes)
+    ]
+    for p in processes:
+        p.start()
+
+    # Stopped with SIGTERM (Railway, systemd): take the workers down too.
+    # A job cut short is picked up again once its lease expires.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        for p in processes:
+            p.join()
+    except KeyboardInterrupt:
+        print("[WORKER] Stopping…")
+    finally:
+        for p in processes:
+            if p.is_alive():
+                p.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# benchmarks/import_budget.py
+# Import-time budget check: the CLI and the pipeline must start without
+# pulling in heavy backends (pandas, openai, torch, transformers).
+#
+# Usage:  python benchmarks/import_budget.py [budget_ms]
+# Exit code 1 if a module is over budget or imports a heavy backend.
+
+import os
+import sys
+import json
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["pandas", "openai", "torch", "transformers", "pyarrow"]
+
+MODULES = ["src.pipeline", "cli"]
+
+PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - start) * 1000
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{"ms": elapsed, "heavy": heavy}}))
+"""
+
+
+def measure(module):
+    """Import `module` in a fresh interpreter → {"ms": ..., "heavy": [...]}"""
+    code = PROBE.format(module=module, heavy=HEAVY_MODULES)
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT_DIR, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    budget_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 500.0
+    ok = True
+
+    for module in MODULES:
+        result = measure(module)
+        status = "OK"
+
+        if result["heavy"]:
+            status = f"FAIL (imports {', '.join(result['heavy'])})"
+            ok = False
+        elif result["ms"] > budget_ms:
+            status = f"FAIL (over {budget_ms:.0f} ms)"
+            ok = False
+
+        print(f"import {module:<14} {result['ms']:8.1f} ms   {status}")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
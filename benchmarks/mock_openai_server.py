@@ -0,0 +1,201 @@
+# benchmarks/mock_openai_server.py
+# Local OpenAI-compatible stand-in for /v1/chat/completions.
+# Configurable latency, jitter, error rate and 429 rate; supports stream=True.
+#
+# Usage:  python benchmarks/mock_openai_server.py --port 8001 --latency 0.3
+# Then:   OPENAI_BASE_URL=http://127.0.0.1:8001/v1 OPENAI_API_KEY=test python3 cli.py
+
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ANSWER = (
+    "Artificial intelligence helps people learn, build and create. "
+    "Keep experimenting, stay curious and share what you discover with others."
+)
+
+
+class MockOpenAIServer:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.2, jitter=0.05,
+                 error_rate=0.0, rate_limit_rate=0.0, retry_after=1, answer=ANSWER):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.answer = answer
+
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    # ---------------------------------------------------------
+    # Lifecycle
+    # ---------------------------------------------------------
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _packed_answer(self, request):
+        """JSON-mode reply for a packed request (see src/packing.py)."""
+        try:
+            prompts = json.loads(request["messages"][-1]["content"])["prompts"]
+        except (KeyError, IndexError, TypeError, ValueError):
+            return "{}"
+        answers = [{"id": p.get("id"), "answer": self.answer} for p in prompts]
+        return json.dumps({"answers": answers})
+
+    # ---------------------------------------------------------
+    # Request handler
+    # ---------------------------------------------------------
+    def _handler_class(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send_json(self, status, payload, headers=None):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+
+                if not self.path.endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": "not found"}})
+                    return
+
+                with mock._lock:
+                    mock.requests += 1
+
+                delay = max(0.0, random.gauss(mock.latency, mock.jitter))
+                time.sleep(delay)
+
+                roll = random.random()
+                if roll < mock.rate_limit_rate:
+                    self._send_json(
+                        429,
+                        {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}},
+                        {"Retry-After": str(mock.retry_after)},
+                    )
+                    return
+                if roll < mock.rate_limit_rate + mock.error_rate:
+                    self._send_json(500, {"error": {"message": "Mock server error", "type": "server_error"}})
+                    return
+
+                max_tokens = request.get("max_tokens") or 300
+                words = mock.answer.split(" ")[:max_tokens]
+                if (request.get("response_format") or {}).get("type") == "json_object":
+                    words = [mock._packed_answer(request)]
+                prompt_tokens = sum(len(m.get("content", "")) for m in request.get("messages", [])) // 4
+                usage = {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": len(words),
+                    "total_tokens": prompt_tokens + len(words),
+                }
+
+                if request.get("stream"):
+                    self._stream(request, words, usage)
+                else:
+                    self._send_json(200, {
+                        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": request.get("model", "mock"),
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": " ".join(words)},
+                            "finish_reason": "stop",
+                        }],
+                        "usage": usage,
+                    })
+
+            def _stream(self, request, words, usage):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+
+                base = {
+                    "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": request.get("model", "mock"),
+                }
+                try:
+                    for i, word in enumerate(words):
+                        delta = {"content": word if i == 0 else " " + word}
+                        chunk = dict(base, choices=[{"index": 0, "delta": delta, "finish_reason": None}])
+                        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                        self.wfile.flush()
+
+                    if (request.get("stream_options") or {}).get("include_usage"):
+                        chunk = dict(base, choices=[], usage=usage)
+                        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    # Client closed the stream early (e.g. early abort)
+                    pass
+                self.close_connection = True
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenAI chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.2, help="mean latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.05, help="latency std dev (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of 500 responses")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of 429 responses")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After sent with 429 (s)")
+    args = parser.parse_args()
+
+    server = MockOpenAIServer(
+        args.host, args.port, args.latency, args.jitter,
+        args.error_rate, args.rate_limit_rate, args.retry_after,
+    )
+    print(f"Mock OpenAI server on {server.base_url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+# benchmarks/run_benchmarks.py
+# Benchmarks the pipeline against the local mock OpenAI server
+# (no API key needed) and saves the numbers as JSON for comparison.
+#
+# Usage:
+#   python benchmarks/run_benchmarks.py                       # default scenario
+#   python benchmarks/run_benchmarks.py --sizes 10 100 1000 --latency 0.3
+#   python benchmarks/run_benchmarks.py --compare benchmarks/results/old.json
+
+import os
+import sys
+import csv
+import json
+import math
+import time
+import asyncio
+import argparse
+import datetime
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.mock_openai_server import MockOpenAIServer
+
+
+# -----------------------------------------------------------
+# Helpers
+# -----------------------------------------------------------
+def percentile(values, pct):
+    """Nearest-rank percentile (values need not be sorted)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies_ms):
+    return {
+        "count": len(latencies_ms),
+        "p50_ms": percentile(latencies_ms, 50),
+        "p95_ms": percentile(latencies_ms, 95),
+        "p99_ms": percentile(latencies_ms, 99),
+    }
+
+
+def write_csv(path, size):
+    prompts = [
+        "Write a 2-line inspirational quote.",
+        "Explain quantum computing for kids.",
+        "Give 3 tips to improve coding skills.",
+        "Describe the future of AI in medicine.",
+        "Write a short story about a robot chef.",
+    ]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["prompt"])
+        for i in range(size):
+            # Unique prompts so the response cache can't help
+            writer.writerow([f"{prompts[i % len(prompts)]} (#{i})"])
+
+
+def item_latencies(results):
+    return [
+        r["timings"]["generate_ms"]
+        for r in results if isinstance(r.get("timings"), dict) and "generate_ms" in r["timings"]
+    ]
+
+
+# -----------------------------------------------------------
+# Scenarios
+# -----------------------------------------------------------
+def bench_run(pipeline, repeat):
+    walls = []
+    items = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = pipeline.run()
+        walls.append((time.perf_counter() - start) * 1000)
+        items += item_latencies(results)
+
+    return {"wall": summarize(walls), "items": summarize(items)}
+
+
+def bench_batch(pipeline, workdir, size):
+    path = os.path.join(workdir, f"prompts_{size}.csv")
+    write_csv(path, size)
+
+    start = time.perf_counter()
+    results = pipeline.run_batch_csv(path, resume=False)
+    wall = time.perf_counter() - start
+
+    errors = sum(1 for r in results if r.get("error"))
+    return {
+        "size": size,
+        "wall_s": round(wall, 3),
+        "throughput_per_s": round(len(results) / wall, 2) if wall else None,
+        "errors": errors,
+        "items": summarize(item_latencies(results)),
+    }
+
+
+def bench_filters(text_kb, repeat):
+    from src.content_filter import ContentFilter
+    from src.ethical_filter import EthicalFilter
+
+    sentence = "The robot chef prepared a harmless pharmacy-themed meal without any attack. "
+    text = sentence * (text_kb * 1024 // len(sentence) + 1)
+
+    out = {}
+    for name, fn in (
+        ("content_filter.check", ContentFilter().check),
+        ("ethical_filter.report", EthicalFilter().report),
+    ):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn(text)
+            timings.append((time.perf_counter() - start) * 1000)
+        out[name] = dict(summarize(timings), text_kb=text_kb)
+    return out
+
+
+class _FakeMessage:
+    """Stands in for telegram.Message: counts reply_text calls."""
+
+    def __init__(self):
+        self.sent = 0
+
+    async def reply_text(self, text, **kwargs):
+        self.sent += 1
+        return self
+
+
+class _FakeChat:
+    id = 1
+
+
+class _FakeUpdate:
+    def __init__(self):
+        self.message = _FakeMessage()
+        self.callback_query = None
+        self.effective_chat = _FakeChat()
+
+
+def split_message(text, limit=4000):
+    """The bot's old full dump: every result, split into 4000-char messages."""
+    chunks, chunk = [], ""
+    for line in text.split("\n"):
+        if len(chunk) + len(line) + 1 > limit:
+            chunks.append(chunk)
+            chunk = ""
+        chunk += line + "\n"
+    if chunk.strip():
+        chunks.append(chunk)
+    return chunks
+
+
+def bench_bot_rendering(result_count, repeat):
+    """Full results dump vs. paginated view on a big result set (needs python-telegram-bot)."""
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "0:benchmark")
+    # Measure rendering cost, not the flood-control pacing
+    os.environ.setdefault("BOT_SEND_RATE_GLOBAL", "100000")
+    os.environ.setdefault("BOT_SEND_RATE_PER_CHAT", "100000")
+    os.environ.setdefault("BOT_SEND_BURST_PER_CHAT", "100000")
+    try:
+        from automation import telegram_bot
+    except ImportError as e:
+        return {"skipped": f"telegram bot not importable: {e}"}
+
+    results = [
+        {
+            "prompt": f"Prompt #{i}",
+            "generated_text": "Some generated text. " * 40,
+            "flagged": i % 7 == 0,
+            "flagged_words": ["attack"] if i % 7 == 0 else [],
+        }
+        for i in range(result_count)
+    ]
+
+    format_ms, split_ms, page_ms, messages, page_messages = [], [], [], 0, 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        text = telegram_bot.format_results(results)
+        format_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        messages = len(split_message(text))
+        split_ms.append((time.perf_counter() - start) * 1000)
+
+        # Paginated view: first page sent, every page rendered once
+        telegram_bot.rendered_pages.clear()
+        update = _FakeUpdate()
+        start = time.perf_counter()
+        asyncio.run(telegram_bot.show_results(update, results))
+        page_ms.append((time.perf_counter() - start) * 1000)
+        page_messages = update.message.sent
+
+    run_id = telegram_bot.remember_results(_FakeChat.id, results)
+    start = time.perf_counter()
+    for page in range(-(-result_count // telegram_bot.PAGE_SIZE)):
+        telegram_bot.render_page(run_id, results, page)
+    all_pages_ms = (time.perf_counter() - start) * 1000
+
+    return {
+        "results": result_count,
+        "format_results": summarize(format_ms),
+        "split_full_dump": summarize(split_ms),
+        "messages_sent": messages,
+        "show_results": summarize(page_ms),
+        "paginated_messages_sent": page_messages,
+        "render_all_pages_ms": round(all_pages_ms, 2),
+    }
+
+
+# -----------------------------------------------------------
+# Comparison with a previous run
+# -----------------------------------------------------------
+def compare(previous, current, prefix=""):
+    for key, value in current.items():
+        old = previous.get(key) if isinstance(previous, dict) else None
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            compare(old or {}, value, name + ".")
+        elif isinstance(value, (int, float)) and isinstance(old, (int, float)) and old:
+            change = (value - old) / old * 100
+            print(f"  {name:<55} {old:>12.2f} → {value:>12.2f}  ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline benchmarks against a mock OpenAI server")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, default=None, help="PIPELINE_MAX_WORKERS")
+    parser.add_argument("--pack", action="store_true", help="BATCH_PACKING=true for the CSV batches")
+    parser.add_argument("--filter-kb", type=int, default=1024)
+    parser.add_argument("--bot-results", type=int, default=500)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--compare", default=None, help="previous results JSON")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="pipeline_bench_")
+
+    with MockOpenAIServer(
+        latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+    ) as server:
+        # Point the pipeline at the mock, keep its files out of the repo
+        os.environ.update({
+            "OPENAI_API_KEY": "benchmark",
+            "OPENAI_BASE_URL": server.base_url,
+            "RESPONSE_CACHE": "false",
+            "RESULTS_PATH": os.path.join(workdir, "results.jsonl"),
+        })
+        if args.workers:
+            os.environ["PIPELINE_MAX_WORKERS"] = str(args.workers)
+        if args.pack:
+            os.environ["BATCH_PACKING"] = "true"
+        os.chdir(workdir)
+
+        from src.pipeline import ContentPipeline
+        pipeline = ContentPipeline(use_api=True)
+
+        report = {
+            "timestamp": datetime.datetime.now().isoformat(),
+            "config": vars(args),
+            "run": bench_run(pipeline, args.repeat),
+            "batch_csv": {str(size): bench_batch(pipeline, workdir, size) for size in args.sizes},
+            "filters": bench_filters(args.filter_kb, args.repeat),
+            "bot_rendering": bench_bot_rendering(args.bot_results, args.repeat),
+            "mock_requests": server.requests,
+        }
+
+    output = args.output or os.path.join(
+        ROOT_DIR, "benchmarks", "results",
+        f"bench_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(json.dumps(report, indent=2))
+    print(f"\n[BENCH] Saved to {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        print(f"\n[BENCH] Compared with {args.compare}:")
+        compare(previous, report)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,36 @@
 # cli.py
+#   python cli.py                                  → interactive menu
+#   python cli.py batch big.csv --shard 0/4        → streaming batch (shard 0 of 4)
 import sys
+import argparse
 from src.pipeline import ContentPipeline
+from src.job_queue import JobQueue
 
-pipeline = ContentPipeline(use_api=True)
+# Created on first use: "View last results" never pays for API setup
+pipeline = None
+
+def get_pipeline():
+    global pipeline
+    if pipeline is None:
+        pipeline = ContentPipeline(use_api=True)
+    return pipeline
+
+# JOB_QUEUE=true: generations are handed to automation/worker.py processes
+job_queue = JobQueue.from_env()
+
+def run_job(kind, **payload):
+    job_id = job_queue.enqueue(kind, payload)
+    print(f"[CLI] Queued job {job_id}, waiting for a worker (python automation/worker.py)...")
+    job = job_queue.wait_or_cancel(job_id)
+    if job is not None and job["status"] == "done":
+        return job["result"]
+    return f"[CLI] Job {job_id} failed: {job['error'] if job else 'job not found'}"
 
 # ---------------------------------------------------------
 # Option 1 - Default prompts pipeline
 # ---------------------------------------------------------
 def run_default_pipeline():
-    results = pipeline.run()
+    results = run_job("default") if job_queue else get_pipeline().run()
     print("\n--- RESULTS ---")
     print(results)
     print("----------------\n")
@@ -18,8 +40,15 @@ def run_default_pipeline():
 # ---------------------------------------------------------
 def run_custom_prompt():
     prompt = input("\nEnter your prompt: ")
-    results = pipeline.process_single(prompt)   # FIXED
-    print("\n--- RESULTS ---")
+    print()
+    if job_queue:
+        results = run_job("single", prompt=prompt)
+    else:
+        # Stream the answer to the terminal while it is generated
+        results = get_pipeline().process_single(
+            prompt, on_delta=lambda delta: print(delta, end="", flush=True)
+        )
+    print("\n\n--- RESULTS ---")
     print(results)
     print("----------------\n")
 
@@ -29,24 +58,81 @@ def run_custom_prompt():
 def run_batch_csv():
     csv_path = "data/prompts.csv"
     print(f"[CLI] Using default CSV file: {csv_path}")
-    results = pipeline.run_batch_csv(csv_path)  # FIXED
+    if job_queue:
+        results = run_job("batch_csv", csv_path=csv_path)
+    else:
+        results = get_pipeline().run_batch_csv(csv_path)  # FIXED
+    print("\n--- RESULTS ---")
+    print(results)
+    print("----------------\n")
+
+# ---------------------------------------------------------
+# Option 4 - Batch CSV through the offline Batch API
+# ---------------------------------------------------------
+def run_batch_api():
+    csv_path = "data/prompts.csv"
+    print(f"[CLI] Submitting {csv_path} to the Batch API (this can take a while)...")
+    results = get_pipeline().run_batch_api(csv_path)
     print("\n--- RESULTS ---")
     print(results)
     print("----------------\n")
 
 # ---------------------------------------------------------
-# Option 4 - View last results
+# Option 5 - View last results
 # ---------------------------------------------------------
 def view_last_results():
-    results = pipeline.get_last_results()
+    results = get_pipeline().get_last_results()
     print("\n--- LAST RESULTS ---")
     print(results)
     print("----------------\n")
 
+# ---------------------------------------------------------
+# Streaming batch: large CSV in chunks, optional shard i/N
+# ---------------------------------------------------------
+def run_streaming_batch(args):
+    processed = flagged = errors = 0
+    results = get_pipeline().iter_batch_csv(
+        args.csv_path,
+        chunk_size=args.chunk_size,
+        shard=args.shard,
+        max_workers=args.workers,
+        resume=False if args.no_resume else None,
+    )
+    for result in results:
+        if result["prompt"] == "CSV_ERROR":
+            print(f"[CLI] CSV error: {result['generated_text']}")
+            sys.exit(1)
+
+        processed += 1
+        flagged += bool(result["flagged"])
+        errors += bool(result.get("error"))
+        if processed % 1000 == 0:
+            print(f"[CLI] {processed} prompts processed ({flagged} flagged, {errors} errors)")
+
+    print(f"[CLI] Done: {processed} prompts processed ({flagged} flagged, {errors} errors).")
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="DI GenAI Content Pipeline")
+    commands = parser.add_subparsers(dest="command")
+
+    batch = commands.add_parser("batch", help="stream a (large) prompt CSV in chunks")
+    batch.add_argument("csv_path", nargs="?", default="data/prompts.csv")
+    batch.add_argument("--chunk-size", type=int, default=None, help="rows read at a time (BATCH_CHUNK_SIZE)")
+    batch.add_argument("--shard", default=None, help="i/N: only process shard i of N (stable row hash)")
+    batch.add_argument("--workers", type=int, default=None, help="prompts in flight (PIPELINE_MAX_WORKERS)")
+    batch.add_argument("--no-resume", action="store_true", help="ignore checkpoints of an earlier run")
+
+    return parser.parse_args(argv)
+
 # ---------------------------------------------------------
 # Menu loop
 # ---------------------------------------------------------
 def main():
+    args = parse_args(sys.argv[1:])
+    if args.command == "batch":
+        run_streaming_batch(args)
+        return
+
     while True:
         print("""
 ==========================================
@@ -56,8 +142,9 @@ def main():
 1) Run pipeline on default prompts
 2) Enter a custom prompt
 3) Run batch on CSV file
-4) View last results
-5) Quit
+4) Run batch on CSV file (offline Batch API)
+5) View last results
+6) Quit
 """)
 
         choice = input("Select an option: ").strip()
@@ -69,8 +156,10 @@ def main():
         elif choice == "3":
             run_batch_csv()
         elif choice == "4":
-            view_last_results()
+            run_batch_api()
         elif choice == "5":
+            view_last_results()
+        elif choice == "6":
             print("Goodbye!")
             sys.exit(0)
         else:
@@ -1,6 +1,9 @@
 # src/api_generator.py
 
 import os
+import threading
+import importlib
+
 import openai
 from dotenv import load_dotenv
 
@@ -8,6 +11,74 @@ load_dotenv()
 
 from openai import OpenAI
 
+from .response_cache import ResponseCache
+from .similarity_cache import SimilarityCache
+from .metrics import metrics
+from .singleflight import SingleFlight
+from .packing import build_packed_messages, parse_packed_answers
+from .resilience import GenerationError, RetryPolicy, CircuitBreaker
+from .utils import env_int
+
+_http_client = None
+_http_client_lock = threading.Lock()
+
+
+def _http_package():
+    """The httpx package the installed openai SDK is built on (httpx or httpx2)."""
+    base = next(c for c in openai.DefaultHttpxClient.__mro__ if c.__name__ == "Client")
+    return importlib.import_module(base.__module__.split(".")[0])
+
+
+httpx = _http_package()
+
+
+def shared_http_client():
+    """
+    One pooled HTTP client per process: every APIGenerator reuses its
+    keep-alive connections. Explicit connect/read timeouts, so a hung
+    connection fails (and is retried) instead of blocking a worker.
+    """
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = openai.DefaultHttpxClient(
+                timeout=openai.Timeout(
+                    float(os.getenv("API_READ_TIMEOUT", "60")),
+                    connect=float(os.getenv("API_CONNECT_TIMEOUT", "5")),
+                ),
+                limits=httpx.Limits(
+                    max_connections=env_int("API_MAX_CONNECTIONS", 32),
+                    max_keepalive_connections=env_int("API_MAX_KEEPALIVE", 16),
+                    keepalive_expiry=30,
+                ),
+            )
+    return _http_client
+
+
+def classify_error(e):
+    """Map an openai / httpx exception → GenerationError."""
+    retry_after = None
+    response = getattr(e, "response", None)
+    if response is not None:
+        try:
+            retry_after = float(response.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            pass
+
+    if isinstance(e, (openai.APITimeoutError, httpx.TimeoutException)):
+        return GenerationError(str(e), "timeout", retryable=True)
+    if isinstance(e, (openai.APIConnectionError, httpx.TransportError)):
+        return GenerationError(str(e), "connection", retryable=True)
+    if isinstance(e, openai.RateLimitError):
+        return GenerationError(str(e), "rate_limit", retryable=True, retry_after=retry_after)
+    if isinstance(e, openai.APIStatusError):
+        if e.status_code >= 500:
+            return GenerationError(str(e), "server", retryable=True, retry_after=retry_after)
+        if e.status_code == 408:
+            return GenerationError(str(e), "timeout", retryable=True)
+        return GenerationError(str(e), "client")
+    return GenerationError(str(e), "unknown")
+
 
 class APIGenerator:
     """
@@ -16,26 +87,290 @@ class APIGenerator:
     Works for CLI, Telegram bot, Railway deployment.
     """
 
-    def __init__(self):
+    # generate() / stream() accept model= (prompt screening "route")
+    supports_model_override = True
+
+    def __init__(self, cache=None):
         self.api_key = os.getenv("OPENAI_API_KEY")
         self.model = os.getenv("MODEL_NAME", "gpt-4o-mini")
+        self.max_tokens = 300
+
+        # Sampling parameters (None = API default, not sent)
+        self.temperature = None
+        self.top_p = None
 
         if not self.api_key:
             raise ValueError("ERROR: OPENAI_API_KEY not found in environment")
 
-        self.client = OpenAI(api_key=self.api_key)
+        # Retries are ours (classified, with a circuit breaker), not the SDK's
+        self.client = OpenAI(
+            api_key=self.api_key,
+            http_client=shared_http_client(),
+            max_retries=0,
+        )
+        self.retry = RetryPolicy.from_env()
+        self.breaker = CircuitBreaker.from_env()
+
+        # Response cache (RESPONSE_CACHE=false in .env disables it)
+        self.cache = cache if cache is not None else ResponseCache.from_env()
+
+        # Near-duplicate prompt cache (SIMILARITY_CACHE=true enables it)
+        self.similar = SimilarityCache.from_env()
+
+        # Identical requests running at the same time share one API call
+        self.coalesce = os.getenv("COALESCE_REQUESTS", "true").lower() == "true"
+        self._in_flight = SingleFlight()
+
+    @staticmethod
+    def _record_usage(usage, info):
+        """Count token usage (metrics + optional per-call info dict)."""
+        if usage is None:
+            return
+        usage = {
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+            "total_tokens": usage.total_tokens,
+        }
+        metrics.inc("pipeline_tokens_total", usage["prompt_tokens"], kind="prompt")
+        metrics.inc("pipeline_tokens_total", usage["completion_tokens"], kind="completion")
+        if info is not None:
+            info["usage"] = usage
+
+    def _cache_lookup(self, model, messages, params, info):
+        key = ResponseCache.make_key(model, messages, **params)
+        cached = self.cache.get(key)
+        metrics.inc("pipeline_cache_total", result="hit" if cached is not None else "miss")
+        if info is not None:
+            info["cached"] = cached is not None
+        return key, cached
+
+    def _similar_lookup(self, prompt, model, params, info):
+        """Near-duplicate lookup → (scope, cached text or None)."""
+        # Answers are only reused for the same model + generation params
+        scope = ResponseCache.make_key(model, [], **params)
+        hit = self.similar.get(prompt, scope)
+        metrics.inc("pipeline_cache_total", result="similar_hit" if hit else "similar_miss")
+        if hit is None:
+            return scope, None
+
+        text, matched, score = hit
+        if info is not None:
+            info["cached"] = True
+            info["similar_to"] = {"prompt": matched, "score": score}
+        return scope, text
+
+    def _request_params(self):
+        params = {"max_tokens": self.max_tokens}
+        if self.temperature is not None:
+            params["temperature"] = self.temperature
+        if self.top_p is not None:
+            params["top_p"] = self.top_p
+        return params
 
-    def generate(self, prompt: str) -> str:
-        """Generate text using OpenAI Chat Completions API."""
+    def _create(self, **kwargs):
+        """chat.completions.create with retries + circuit breaker."""
+        return self.retry.call(
+            lambda: self.client.chat.completions.create(**kwargs),
+            classify_error,
+            self.breaker,
+        )
+
+    def _complete(self, model, messages, params):
+        """One chat completion call → (text, usage object)."""
+        response = self._create(model=model, messages=messages, **params)
+        return response.choices[0].message.content, response.usage
+
+    def generate(self, prompt: str, use_cache: bool = True, model: str = None,
+                 info: dict = None, coalesce: bool = None) -> str:
+        """
+        Generate text using OpenAI Chat Completions API.
+        use_cache=False bypasses the response cache (fresh sample).
+        model overrides MODEL_NAME for this call.
+        info (optional dict) receives "model", "cached", "coalesced", "usage"
+        and "similar_to" (matched prompt + score on a near-duplicate hit).
+        coalesce: share the result of an identical request already in
+        flight (default: on unless use_cache=False asks for a fresh sample).
+        Raises GenerationError once retries are exhausted.
+        """
+        model = model or self.model
+        messages = [{"role": "user", "content": prompt}]
+        params = self._request_params()
+        if info is not None:
+            info["model"] = model
+
+        key = None
+        if self.cache and use_cache:
+            key, cached = self._cache_lookup(model, messages, params, info)
+            if cached is not None:
+                return cached
+
+        scope = None
+        if self.similar and use_cache:
+            scope, similar = self._similar_lookup(prompt, model, params, info)
+            if similar is not None:
+                return similar
+
+        if coalesce is None:
+            coalesce = self.coalesce and use_cache
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=300,
-            )
+            if coalesce:
+                flight_key = key or ResponseCache.make_key(model, messages, **params)
+                (text, usage), shared = self._in_flight.do(
+                    flight_key, lambda: self._complete(model, messages, params)
+                )
+            else:
+                (text, usage), shared = self._complete(model, messages, params), False
+
+        except GenerationError as e:
+            metrics.inc("pipeline_errors_total", stage="generate", kind=e.kind)
+            raise
+
+        if shared:
+            # Tokens were paid (and cached) by the call we attached to
+            metrics.inc("pipeline_coalesced_total")
+            if info is not None:
+                info["coalesced"] = True
+            return text
+
+        self._record_usage(usage, info)
+
+        # Errors are raised above and never cached
+        if key is not None and text is not None:
+            self.cache.set(key, text)
+        if scope is not None and text:
+            self.similar.set(prompt, text, scope)
+
+        return text
+
+    def generate_packed(self, prompts, model: str = None, info: dict = None):
+        """
+        Answer several prompts with one JSON-mode request.
+        Returns one answer per prompt; None where the reply could not be
+        split (or the request failed) so the caller can retry it alone.
+        Packed answers are not cached: they were sampled together.
+        """
+        model = model or self.model
+        messages = build_packed_messages(prompts)
+        params = self._request_params()
+        params["max_tokens"] = self.max_tokens * len(prompts)
+        params["response_format"] = {"type": "json_object"}
+        if info is not None:
+            info["model"] = model
+
+        try:
+            text, usage = self._complete(model, messages, params)
+        except GenerationError as e:
+            metrics.inc("pipeline_errors_total", stage="generate_packed", kind=e.kind)
+            print(f"[API] Packed request failed ({len(prompts)} prompts): {e}")
+            return [None] * len(prompts)
+
+        self._record_usage(usage, info)
+        metrics.inc("pipeline_packed_requests_total")
+        return parse_packed_answers(text, len(prompts))
+
+    def stream(self, prompt: str, use_cache: bool = True, model: str = None,
+               info: dict = None, coalesce: bool = None):
+        """
+        Generate text with stream=True, yielding text deltas as they arrive.
+        A cached answer is yielded in one piece. Closing the generator
+        early closes the HTTP stream (no more tokens are produced).
+        info (optional dict) is filled like in generate().
+        coalesce: like in generate(); a caller attached to an identical
+        request in flight (stream or not) gets its final text as one delta.
+        If that request is closed early, the caller streams on its own.
+        Opening the stream is retried; a failure mid-stream raises
+        GenerationError (tokens already yielded can't be taken back).
+        """
+        model = model or self.model
+        messages = [{"role": "user", "content": prompt}]
+        params = self._request_params()
+        if info is not None:
+            info["model"] = model
+
+        key = None
+        if self.cache and use_cache:
+            key, cached = self._cache_lookup(model, messages, params, info)
+            if cached is not None:
+                yield cached
+                return
+
+        scope = None
+        if self.similar and use_cache:
+            scope, similar = self._similar_lookup(prompt, model, params, info)
+            if similar is not None:
+                yield similar
+                return
+
+        if coalesce is None:
+            coalesce = self.coalesce and use_cache
+
+        # Same key as generate(): streams and plain calls share flights
+        flight_key, flight = key or ResponseCache.make_key(model, messages, **params), None
+        while coalesce:
+            flight, leader = self._in_flight.begin(flight_key)
+            if leader:
+                break
+            try:
+                shared = flight.result()
+            except GenerationError as e:
+                metrics.inc("pipeline_errors_total", stage="generate", kind=e.kind)
+                raise
+            if shared is not SingleFlight.ABANDONED:
+                metrics.inc("pipeline_coalesced_total")
+                if info is not None:
+                    info["coalesced"] = True
+                if shared[0]:
+                    yield shared[0]
+                return
+
+        parts = []
+        outcome, failure = SingleFlight.ABANDONED, None
+        try:
+            try:
+                response = self._create(
+                    model=model,
+                    messages=messages,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                    **params,
+                )
+            except GenerationError as e:
+                metrics.inc("pipeline_errors_total", stage="generate", kind=e.kind)
+                failure = e
+                raise
+
+            try:
+                for chunk in response:
+                    # Last chunk carries the usage and no choices
+                    if chunk.usage is not None:
+                        self._record_usage(chunk.usage, info)
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        parts.append(delta)
+                        yield delta
+
+            except Exception as e:
+                error = e if isinstance(e, GenerationError) else classify_error(e)
+                metrics.inc("pipeline_errors_total", stage="generate", kind=error.kind)
+                failure = error
+                if error is e:
+                    raise
+                raise error from e
+
+            finally:
+                response.close()
+
+            outcome = ("".join(parts), None)
 
-            return response.choices[0].message.content
+        finally:
+            # Closed early (GeneratorExit) → followers run their own call
+            if flight is not None:
+                self._in_flight.finish(flight_key, flight, outcome, failure)
 
-        except Exception as e:
-            return f"[API ERROR]\n{e}"
+        if key is not None:
+            self.cache.set(key, "".join(parts))
+        if scope is not None and parts:
+            self.similar.set(prompt, "".join(parts), scope)
@@ -0,0 +1,61 @@
+# src/backends.py
+# Lazy registry for heavy backends (pandas, openai, transformers/torch models).
+# Nothing here is imported until a feature actually asks for it, so
+# `import src.pipeline` and the CLI start instantly.
+
+import importlib
+import threading
+
+_REGISTRY = {}   # name -> "module:attribute" (attribute optional)
+_LOADED = {}
+_lock = threading.Lock()
+
+
+def register_backend(name, target):
+    """Register `target` ("package.module" or "package.module:Attr") under `name`."""
+    _REGISTRY[name] = target
+    _LOADED.pop(name, None)
+
+
+def get_backend(name):
+    """Import (once) and return the registered module / attribute."""
+    if name in _LOADED:
+        return _LOADED[name]
+
+    with _lock:
+        if name not in _LOADED:
+            if name not in _REGISTRY:
+                raise KeyError(f"Unknown backend: {name}")
+
+            module_name, _, attribute = _REGISTRY[name].partition(":")
+            module = importlib.import_module(module_name)
+            _LOADED[name] = getattr(module, attribute) if attribute else module
+
+    return _LOADED[name]
+
+
+def backend_available(name):
+    """True if the backend can be imported (e.g. transformers is installed)."""
+    if name not in _REGISTRY:
+        raise KeyError(f"Unknown backend: {name}")
+
+    # Installed but broken stacks (torch, CUDA libs) fail with OSError /
+    # RuntimeError on import, not only ImportError
+    try:
+        get_backend(name)
+        return True
+    except Exception:
+        return False
+
+
+# -----------------------------------------------------------
+# Built-in backends
+# -----------------------------------------------------------
+register_backend("pandas", "pandas")
+register_backend("pyarrow", "pyarrow")
+register_backend("pyarrow_dataset", "pyarrow.dataset")
+register_backend("pyarrow_parquet", "pyarrow.parquet")
+register_backend("api_generator", f"{__package__}.api_generator:APIGenerator")
+register_backend("local_generator", f"{__package__}.local_generator:LocalGenerator")
+register_backend("text_generator", f"{__package__}.generator:TextGenerator")
+register_backend("summarizer", f"{__package__}.summarizer:Summarizer")
@@ -0,0 +1,177 @@
+# src/batch_api.py
+# Offline (Batch API) generation: write a requests JSONL file, submit it,
+# poll until done, then read the output file back.
+
+import os
+import json
+import time
+import uuid
+
+
+# -----------------------------------------------------------
+# Backend talking to the real OpenAI Batch API
+# -----------------------------------------------------------
+class OpenAIBatchBackend:
+    def __init__(self, client, completion_window="24h"):
+        self.client = client
+        self.completion_window = completion_window
+
+    def submit(self, requests_path):
+        with open(requests_path, "rb") as f:
+            upload = self.client.files.create(file=f, purpose="batch")
+
+        batch = self.client.batches.create(
+            input_file_id=upload.id,
+            endpoint="/v1/chat/completions",
+            completion_window=self.completion_window,
+        )
+        return batch.id
+
+    def status(self, batch_id):
+        batch = self.client.batches.retrieve(batch_id)
+        return {
+            "status": batch.status,
+            "output_file_id": batch.output_file_id,
+            "error_file_id": batch.error_file_id,
+        }
+
+    def download(self, file_id):
+        return self.client.files.content(file_id).text
+
+
+# -----------------------------------------------------------
+# Local stand-in for the batch endpoint (offline testing)
+# Runs every request line through `generate_fn(prompt)`.
+# -----------------------------------------------------------
+class LocalBatchBackend:
+    def __init__(self, generate_fn=None, folder="data/batch"):
+        self.generate_fn = generate_fn or (lambda prompt: f"[LOCAL BATCH] {prompt}")
+        self.folder = folder
+        self.batches = {}
+
+        os.makedirs(folder, exist_ok=True)
+
+    def submit(self, requests_path):
+        batch_id = f"batch_local_{uuid.uuid4().hex[:12]}"
+        output_path = os.path.join(self.folder, f"{batch_id}_output.jsonl")
+
+        with open(requests_path, "r", encoding="utf-8") as src, \
+                open(output_path, "w", encoding="utf-8") as out:
+            for line in src:
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                prompt = request["body"]["messages"][-1]["content"]
+
+                try:
+                    text = self.generate_fn(prompt)
+                    entry = {
+                        "response": {
+                            "status_code": 200,
+                            "body": {"choices": [{"message": {"role": "assistant", "content": text}}]},
+                        },
+                        "error": None,
+                    }
+                except Exception as e:
+                    entry = {"response": None, "error": {"message": str(e)}}
+
+                entry["id"] = f"req_{uuid.uuid4().hex[:12]}"
+                entry["custom_id"] = request["custom_id"]
+                out.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+        self.batches[batch_id] = output_path
+        return batch_id
+
+    def status(self, batch_id):
+        return {"status": "completed", "output_file_id": batch_id, "error_file_id": None}
+
+    def download(self, file_id):
+        with open(self.batches[file_id], "r", encoding="utf-8") as f:
+            return f.read()
+
+
+# -----------------------------------------------------------
+# Runner: prompts → requests.jsonl → batch → {custom_id: text}
+# -----------------------------------------------------------
+class BatchRunner:
+    FINAL_STATES = ("completed", "failed", "expired", "cancelled")
+
+    def __init__(self, backend, model, max_tokens=300, folder="data/batch",
+                 poll_interval=30, timeout=None):
+        self.backend = backend
+        self.model = model
+        self.max_tokens = max_tokens
+        self.folder = folder
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+
+        os.makedirs(folder, exist_ok=True)
+
+    def write_requests(self, items, path=None):
+        """items: list of (custom_id, prompt). Returns the JSONL path."""
+        path = path or os.path.join(self.folder, "requests.jsonl")
+
+        with open(path, "w", encoding="utf-8") as f:
+            for custom_id, prompt in items:
+                request = {
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": {
+                        "model": self.model,
+                        "messages": [{"role": "user", "content": prompt}],
+                        "max_tokens": self.max_tokens,
+                    },
+                }
+                f.write(json.dumps(request, ensure_ascii=False) + "\n")
+
+        return path
+
+    def wait(self, batch_id):
+        started = time.monotonic()
+        while True:
+            info = self.backend.status(batch_id)
+            if info["status"] in self.FINAL_STATES:
+                return info
+
+            if self.timeout is not None and time.monotonic() - started > self.timeout:
+                raise TimeoutError(f"Batch {batch_id} still '{info['status']}' after {self.timeout}s")
+
+            print(f"[BATCH] {batch_id} status: {info['status']} …")
+            time.sleep(self.poll_interval)
+
+    @staticmethod
+    def parse_output(text):
+        """Output JSONL → {custom_id: (content, error)}"""
+        outputs = {}
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            response = entry.get("response") or {}
+
+            if entry.get("error") or response.get("status_code") != 200:
+                error = entry.get("error") or response.get("body", {}).get("error")
+                if isinstance(error, dict):
+                    error = error.get("message", error)
+                outputs[entry["custom_id"]] = (None, str(error))
+                continue
+
+            content = response["body"]["choices"][0]["message"]["content"]
+            outputs[entry["custom_id"]] = (content, None)
+        return outputs
+
+    def run(self, items):
+        """Submit all items and block until the batch is finished."""
+        path = self.write_requests(items)
+        batch_id = self.backend.submit(path)
+        print(f"[BATCH] Submitted {len(items)} requests as {batch_id}")
+
+        info = self.wait(batch_id)
+
+        outputs = {}
+        for key in ("output_file_id", "error_file_id"):
+            if info.get(key):
+                outputs.update(self.parse_output(self.backend.download(info[key])))
+
+        return batch_id, info["status"], outputs
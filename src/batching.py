@@ -0,0 +1,74 @@
+# src/batching.py
+
+import time
+import queue
+import threading
+from concurrent.futures import Future
+
+
+class DynamicBatcher:
+    """
+    Collects items submitted concurrently (from many threads) for up to
+    `max_wait_ms`, then hands them to `process_fn(list_of_items)` in one
+    call and scatters the returned list back to each caller.
+    """
+
+    def __init__(self, process_fn, max_batch_size=8, max_wait_ms=10):
+        self.process_fn = process_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, daemon=True)
+                self._thread.start()
+
+    # ---------------------------------------------------------
+    # Submit one item → Future with its own result
+    # ---------------------------------------------------------
+    def submit(self, item):
+        self._ensure_started()
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def __call__(self, item):
+        return self.submit(item).result()
+
+    # ---------------------------------------------------------
+    # Worker: gather a batch, run it, dispatch the results
+    # ---------------------------------------------------------
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            items = [item for item, _ in batch]
+
+            try:
+                results = self.process_fn(items)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
@@ -0,0 +1,138 @@
+# src/chat_history.py
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from .utils import env_int
+
+
+class ChatHistory:
+    """
+    Result history per chat (bot users never see each other's runs).
+      1) SQLite: runs indexed by (chat_id, created), records per run;
+         only the last `max_runs_per_chat` runs of a chat are kept
+      2) in-process LRU of the latest run of recent chats, capped by
+         number of chats and by the size of the cached records
+    """
+
+    def __init__(self, path="data/chat_history.sqlite3", max_runs_per_chat=20,
+                 max_cached_chats=1000, max_cache_bytes=64 * 1024 * 1024):
+        self.path = path
+        self.max_runs_per_chat = max_runs_per_chat
+        self.max_cached_chats = max_cached_chats
+        self.max_cache_bytes = max_cache_bytes
+
+        self._cache = OrderedDict()   # chat_id -> (run_id, results, size in bytes)
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " run_id TEXT PRIMARY KEY,"
+            " chat_id INTEGER NOT NULL,"
+            " created REAL NOT NULL,"
+            " records TEXT NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS runs_chat ON runs(chat_id, created)")
+        self._db.commit()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            path=os.getenv("CHAT_HISTORY_PATH", "data/chat_history.sqlite3"),
+            max_runs_per_chat=env_int("CHAT_HISTORY_RUNS", 20),
+            max_cached_chats=env_int("CHAT_HISTORY_CACHE_CHATS", 1000),
+            max_cache_bytes=env_int("CHAT_HISTORY_CACHE_MB", 64) * 1024 * 1024,
+        )
+
+    # ---------------------------------------------------------
+    # LRU of each recent chat's latest run
+    # ---------------------------------------------------------
+    def _cache_put(self, chat_id, run_id, results, size):
+        old = self._cache.pop(chat_id, None)
+        if old is not None:
+            self._cache_bytes -= old[2]
+
+        if size > self.max_cache_bytes:
+            return   # too big to cache, SQLite still has it
+
+        self._cache[chat_id] = (run_id, results, size)
+        self._cache_bytes += size
+        while len(self._cache) > self.max_cached_chats or self._cache_bytes > self.max_cache_bytes:
+            _, (_, _, evicted) = self._cache.popitem(last=False)
+            self._cache_bytes -= evicted
+
+    # ---------------------------------------------------------
+    # Store one run for a chat
+    # ---------------------------------------------------------
+    def add(self, chat_id, results, run_id):
+        records = json.dumps(results, ensure_ascii=False)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO runs (run_id, chat_id, created, records) VALUES (?, ?, ?, ?)",
+                (run_id, chat_id, time.time(), records),
+            )
+            # Keep only the chat's latest runs
+            self._db.execute(
+                "DELETE FROM runs WHERE chat_id = ? AND run_id NOT IN ("
+                " SELECT run_id FROM runs WHERE chat_id = ? ORDER BY created DESC LIMIT ?)",
+                (chat_id, chat_id, self.max_runs_per_chat),
+            )
+            self._db.commit()
+            self._cache_put(chat_id, run_id, results, len(records.encode("utf-8")))
+
+    # ---------------------------------------------------------
+    # Lookups (scoped to the chat)
+    # ---------------------------------------------------------
+    def last_run(self, chat_id, limit=None):
+        """The chat's most recent run (or its last `limit` records)."""
+        with self._lock:
+            cached = self._cache.get(chat_id)
+            if cached is not None:
+                self._cache.move_to_end(chat_id)
+                results = cached[1]
+            else:
+                row = self._db.execute(
+                    "SELECT run_id, records FROM runs WHERE chat_id = ?"
+                    " ORDER BY created DESC LIMIT 1",
+                    (chat_id,),
+                ).fetchone()
+                if row is None:
+                    return []
+                results = json.loads(row[1])
+                self._cache_put(chat_id, row[0], results, len(row[1].encode("utf-8")))
+
+        return results[-limit:] if limit else results
+
+    def get_run(self, chat_id, run_id):
+        """One run of this chat by id (None if unknown or someone else's)."""
+        with self._lock:
+            cached = self._cache.get(chat_id)
+            if cached is not None and cached[0] == run_id:
+                return cached[1]
+
+            row = self._db.execute(
+                "SELECT records FROM runs WHERE chat_id = ? AND run_id = ?", (chat_id, run_id)
+            ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def clear(self, chat_id):
+        with self._lock:
+            self._db.execute("DELETE FROM runs WHERE chat_id = ?", (chat_id,))
+            self._db.commit()
+            old = self._cache.pop(chat_id, None)
+            if old is not None:
+                self._cache_bytes -= old[2]
+
+    def stats(self):
+        return {"cached_chats": len(self._cache), "cached_bytes": self._cache_bytes}
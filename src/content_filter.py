@@ -1,22 +1,53 @@
 # src/content_filter.py
 
+import os
+
+from .matcher import PatternMatcher
+
+
 class ContentFilter:
-    def __init__(self):
-        # mots interdits / sensibles
-        self.blocked_words = [
-            "kill",
-            "attack",
-            "assault",
-            "terror",
-            "harm"
-        ]
+    def __init__(self, blocklist_path=None):
+        # mots interdits / sensibles → catégorie
+        default_blocklist = {
+            "kill": "violence",
+            "attack": "violence",
+            "assault": "violence",
+            "terror": "terrorism",
+            "harm": "self-harm"
+        }
+
+        # Large lists can be loaded from a file (CONTENT_BLOCKLIST_PATH)
+        path = blocklist_path or os.getenv("CONTENT_BLOCKLIST_PATH")
+        if path:
+            self.matcher = PatternMatcher.from_file(path)
+        else:
+            self.matcher = PatternMatcher(default_blocklist)
+
+        self.blocked_words = self.matcher.terms
 
     # ---------------------------------------------------------
     # Check content → returns (flagged: bool, list_of_words: [])
     # ---------------------------------------------------------
     def check(self, text: str):
-        text_lower = text.lower()
-        flagged_words = [w for w in self.blocked_words if w in text_lower]
+        flagged_words = self.matcher.matched_terms(text)
 
         flagged = len(flagged_words) > 0
         return flagged, flagged_words
+
+    # ---------------------------------------------------------
+    # Batch check → list of (flagged, list_of_words)
+    # ---------------------------------------------------------
+    def check_many(self, texts):
+        return [self.check(text) for text in texts]
+
+    # ---------------------------------------------------------
+    # Detailed matches (term, category, start, end)
+    # ---------------------------------------------------------
+    def scan(self, text: str):
+        return self.matcher.scan(text)
+
+    # ---------------------------------------------------------
+    # Incremental scanner for streamed output (.feed / .finish)
+    # ---------------------------------------------------------
+    def stream_scanner(self):
+        return self.matcher.stream_scanner()
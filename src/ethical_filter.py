@@ -1,34 +1,49 @@
 # ethical_filter.py
 # This class will apply rule-based or model-based filtering for unsafe content.
-import json
+import os
+
+from .matcher import PatternMatcher
 
 class EthicalFilter:
-    def __init__(self):
-        # A simple word-based detection system
-        self.blocklist = [
-            "hate", "kill", "violence", "terror", "racist",
-            "attack", "bomb", "sex", "nsfw", "porn"
-        ]
+    def __init__(self, blocklist_path=None):
+        # A simple word-based detection system (word -> category)
+        default_blocklist = {
+            "hate": "hate", "kill": "violence", "violence": "violence",
+            "terror": "terrorism", "racist": "hate", "attack": "violence",
+            "bomb": "weapons", "sex": "sexual", "nsfw": "sexual",
+            "porn": "sexual"
+        }
+
+        path = blocklist_path or os.getenv("ETHICAL_BLOCKLIST_PATH")
+        if path:
+            self.matcher = PatternMatcher.from_file(path)
+        else:
+            self.matcher = PatternMatcher(default_blocklist)
+
+        self.blocklist = self.matcher.terms
 
     def flag_text(self, text):
         """
         Returns True if the text contains prohibited content.
         """
-        lowered = text.lower()
-        for word in self.blocklist:
-            if word in lowered:
-                return True
-        return False
+        return self.matcher.pattern.search(text) is not None
 
     def report(self, text):
         """
         Returns a detail report as a dict.
         """
-        flagged_words = [
-            word for word in self.blocklist if word in text.lower()
-        ]
+        matches = self.matcher.scan(text)
+        flagged_words = list(dict.fromkeys(m.term for m in matches))
 
         return {
             "is_flagged": len(flagged_words) > 0,
-            "flagged_words": flagged_words
+            "flagged_words": flagged_words,
+            "categories": sorted({m.category for m in matches}),
+            "matches": [m._asdict() for m in matches]
         }
+
+    def report_many(self, texts):
+        """
+        Batch version of report().
+        """
+        return [self.report(text) for text in texts]
@@ -0,0 +1,51 @@
+# src/ingest.py
+# Streaming CSV ingestion: prompts are read in fixed-size chunks (flat
+# memory) and can be split into N shards by a stable hash of the row
+# number, so several processes / machines share one file without talking.
+
+import zlib
+
+from .backends import get_backend
+
+
+def parse_shard(shard):
+    """ "i/N" → (i, N); None stays None."""
+    if shard is None or isinstance(shard, tuple):
+        return shard
+
+    try:
+        index, count = (int(part) for part in str(shard).split("/"))
+    except ValueError:
+        raise ValueError(f"Shard must look like i/N, got {shard!r}")
+
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Shard index must be in 0..N-1, got {shard!r}")
+    return index, count
+
+
+def shard_of(row, count):
+    """Stable shard of a CSV row (same on every machine and Python run)."""
+    return zlib.crc32(str(row).encode("utf-8")) % count
+
+
+def iter_csv_chunks(csv_path, chunk_size=1000, shard=None):
+    """
+    Yield lists of (row index, prompt), one per chunk of `chunk_size` CSV
+    rows. With shard=(i, N) only rows of shard i are kept, so a chunk can
+    be shorter (or empty). Chunk numbering follows the file, not the shard.
+    """
+    pd = get_backend("pandas")
+    shard = parse_shard(shard)
+
+    # Only the prompt column is parsed
+    reader = pd.read_csv(csv_path, chunksize=chunk_size, usecols=lambda c: c == "prompt")
+    with reader:
+        for chunk in reader:
+            if "prompt" not in chunk.columns:
+                raise ValueError("CSV must contain a 'prompt' column")
+
+            rows = [(int(row), p) for row, p in chunk["prompt"].dropna().items()]
+            if shard is not None:
+                index, count = shard
+                rows = [(row, p) for row, p in rows if shard_of(row, count) == index]
+            yield rows
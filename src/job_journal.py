@@ -0,0 +1,103 @@
+# src/job_journal.py
+
+import os
+import json
+import hashlib
+import threading
+
+
+class JobJournal:
+    """
+    Checkpoint file for one batch job (data/jobs/<job_id>.jsonl).
+    Each completed prompt is appended (row index + prompt hash + result)
+    and fsynced, so a restarted job can skip what is already done.
+    """
+
+    def __init__(self, job_id, folder="data/jobs", fsync=True):
+        self.job_id = job_id
+        self.path = os.path.join(folder, f"{job_id}.jsonl")
+        self.fsync = fsync
+        self._lock = threading.Lock()
+
+        os.makedirs(folder, exist_ok=True)
+
+    # ---------------------------------------------------------
+    # Stable ids
+    # ---------------------------------------------------------
+    @staticmethod
+    def job_id_for(csv_path):
+        path = os.path.abspath(csv_path)
+        return hashlib.sha1(path.encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def fingerprint(path):
+        """Changes whenever the file is rewritten (size + modification time)."""
+        stat = os.stat(path)
+        return hashlib.sha1(f"{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8")).hexdigest()[:8]
+
+    @staticmethod
+    def prompt_hash(prompt):
+        return hashlib.sha256(str(prompt).encode("utf-8")).hexdigest()[:16]
+
+    # ---------------------------------------------------------
+    # Completed rows → {row: {"row", "hash", "result"}}
+    # ---------------------------------------------------------
+    def _entries(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn line written during a crash
+                        continue
+        except FileNotFoundError:
+            return
+
+    def load(self):
+        return {entry["row"]: entry for entry in self._entries() if "row" in entry}
+
+    def is_done(self, done, row, prompt):
+        entry = done.get(row)
+        return entry is not None and entry["hash"] == self.prompt_hash(prompt)
+
+    # ---------------------------------------------------------
+    # Record one finished prompt (durable before returning)
+    # ---------------------------------------------------------
+    def record(self, row, prompt, result):
+        line = json.dumps(
+            {"row": row, "hash": self.prompt_hash(prompt), "result": result},
+            ensure_ascii=False,
+        )
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+
+    # ---------------------------------------------------------
+    # Chunk-level checkpoints (streaming batches: flat memory)
+    # ---------------------------------------------------------
+    def record_chunk(self, index, failed=()):
+        """Chunk `index` went through; `failed` rows still need a retry."""
+        line = json.dumps({"chunk": index, "failed": sorted(failed)})
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+
+    def load_chunks(self):
+        """{chunk index: rows that failed in it} for the chunks already run."""
+        return {
+            entry["chunk"]: set(entry.get("failed", ()))
+            for entry in self._entries() if "chunk" in entry
+        }
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
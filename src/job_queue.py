@@ -0,0 +1,231 @@
+# src/job_queue.py
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+
+from .utils import env_int
+
+FINISHED = ("done", "failed")
+
+
+class JobQueue:
+    """
+    Durable generation job queue in SQLite (shared by every process on
+    the host: bot, CLI and workers).
+
+    queued → running (claimed by a worker, leased for `visibility_timeout`
+    seconds, extended by heartbeats) → done | failed. A job whose lease
+    runs out (worker crashed) is claimed again, up to `max_attempts` times.
+    """
+
+    def __init__(self, path="data/job_queue.sqlite3", visibility_timeout=300, max_attempts=3,
+                 wait_timeout=600):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.wait_timeout = wait_timeout
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        # Autocommit mode: transactions are explicit (BEGIN IMMEDIATE)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " kind TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " max_attempts INTEGER NOT NULL,"
+            " worker TEXT,"
+            " lease_until REAL,"
+            " result TEXT,"
+            " error TEXT,"
+            " created REAL NOT NULL,"
+            " updated REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, created)")
+
+    # ---------------------------------------------------------
+    # Build the queue from .env (None when JOB_QUEUE is off)
+    # ---------------------------------------------------------
+    @classmethod
+    def from_env(cls, force=False):
+        if not force and os.getenv("JOB_QUEUE", "false").lower() != "true":
+            return None
+
+        return cls(
+            path=os.getenv("JOB_QUEUE_PATH", "data/job_queue.sqlite3"),
+            visibility_timeout=env_int("JOB_VISIBILITY_TIMEOUT", 300),
+            max_attempts=env_int("JOB_MAX_ATTEMPTS", 3),
+            wait_timeout=env_int("JOB_WAIT_TIMEOUT", 600),
+        )
+
+    def _write(self, sql, params=()):
+        with self._lock:
+            return self._db.execute(sql, params).rowcount
+
+    # ---------------------------------------------------------
+    # Producers: bot / CLI
+    # ---------------------------------------------------------
+    def enqueue(self, kind, payload=None, max_attempts=None):
+        job_id = uuid.uuid4().hex[:16]
+        now = time.time()
+        self._write(
+            "INSERT INTO jobs (id, kind, payload, status, max_attempts, created, updated)"
+            " VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+            (job_id, kind, json.dumps(payload or {}), max_attempts or self.max_attempts, now, now),
+        )
+        return job_id
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, kind, payload, status, attempts, worker, result, error, created, updated,"
+                " lease_until FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+
+        return {
+            "id": row[0],
+            "kind": row[1],
+            "payload": json.loads(row[2]),
+            "status": row[3],
+            "attempts": row[4],
+            "worker": row[5],
+            "result": json.loads(row[6]) if row[6] is not None else None,
+            "error": row[7],
+            "created": row[8],
+            "updated": row[9],
+            "lease_until": row[10],
+        }
+
+    def wait(self, job_id, timeout=None, poll_interval=0.5):
+        """Block until the job is done or failed → job dict (None on timeout)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job["status"] in FINISHED:
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(poll_interval)
+
+    def wait_or_cancel(self, job_id, timeout=None, poll_interval=0.5):
+        """
+        Wait for a job, giving up after `wait_timeout` seconds without a
+        live worker on it: the clock only runs while the job is queued or
+        its lease has run out, so a long job that keeps heartbeating is
+        waited for. A job given up on is cancelled (nobody is waiting for
+        it any more) → job dict, None if the job is unknown.
+        Check "status" before using "result".
+        """
+        timeout = timeout or self.wait_timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job["status"] in FINISHED:
+                return job
+
+            if job["status"] == "running" and (job["lease_until"] or 0) > time.time():
+                # A worker is on it: restart the clock
+                deadline = time.monotonic() + timeout
+            elif time.monotonic() >= deadline:
+                reason = f"no worker took the job within {timeout}s (is automation/worker.py running?)"
+                if self.cancel(job_id, reason):
+                    return self.get(job_id)
+                # Claimed just now: keep waiting
+
+            time.sleep(poll_interval)
+
+    def cancel(self, job_id, reason="cancelled"):
+        """Fail a job no worker holds (queued, or lease expired) → True if it was."""
+        return self._write(
+            "UPDATE jobs SET status = 'failed', error = ?, updated = ?"
+            " WHERE id = ? AND (status = 'queued' OR (status = 'running' AND lease_until < ?))",
+            (reason, time.time(), job_id, time.time()),
+        ) > 0
+
+    # ---------------------------------------------------------
+    # Workers
+    # ---------------------------------------------------------
+    def claim(self, worker_id):
+        """Lease the oldest runnable job → job dict, or None if the queue is empty."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                # Leases that ran out on their last attempt: give up
+                self._db.execute(
+                    "UPDATE jobs SET status = 'failed', error = 'lease expired', updated = ?"
+                    " WHERE status = 'running' AND lease_until < ? AND attempts >= max_attempts",
+                    (now, now),
+                )
+                row = self._db.execute(
+                    "SELECT id FROM jobs"
+                    " WHERE status = 'queued' OR (status = 'running' AND lease_until < ?)"
+                    " ORDER BY created LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is not None:
+                    self._db.execute(
+                        "UPDATE jobs SET status = 'running', attempts = attempts + 1,"
+                        " worker = ?, lease_until = ?, updated = ? WHERE id = ?",
+                        (worker_id, now + self.visibility_timeout, now, row[0]),
+                    )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+        return self.get(row[0]) if row is not None else None
+
+    def heartbeat(self, job_id, worker_id):
+        """Extend the lease → False if the job is no longer ours."""
+        now = time.time()
+        return self._write(
+            "UPDATE jobs SET lease_until = ?, updated = ?"
+            " WHERE id = ? AND worker = ? AND status = 'running'",
+            (now + self.visibility_timeout, now, job_id, worker_id),
+        ) > 0
+
+    def complete(self, job_id, worker_id, result):
+        return self._write(
+            "UPDATE jobs SET status = 'done', result = ?, error = NULL, lease_until = NULL, updated = ?"
+            " WHERE id = ? AND worker = ? AND status = 'running'",
+            (json.dumps(result), time.time(), job_id, worker_id),
+        ) > 0
+
+    def fail(self, job_id, worker_id, error):
+        """Requeue the job, or mark it failed once its attempts are used up."""
+        return self._write(
+            "UPDATE jobs SET error = ?, lease_until = NULL, updated = ?,"
+            " status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END"
+            " WHERE id = ? AND worker = ? AND status = 'running'",
+            (str(error), time.time(), job_id, worker_id),
+        ) > 0
+
+    # ---------------------------------------------------------
+    # Housekeeping
+    # ---------------------------------------------------------
+    def stats(self):
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+    def purge(self, older_than=7 * 24 * 3600):
+        """Delete finished jobs not updated for `older_than` seconds."""
+        return self._write(
+            "DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated < ?",
+            (time.time() - older_than,),
+        )
@@ -1,39 +1,71 @@
 # src/local_generator.py
 
+import threading
+
 from transformers import AutoTokenizer, AutoModelForCausalLM
 import torch
 
+from .batching import DynamicBatcher
+from .utils import env_int
+
 
 class LocalGenerator:
     """
     Simple local text generator using a small HF model.
     Used only when USE_OPENAI_API != true in .env
+
+    Concurrent .generate() calls are grouped by a DynamicBatcher into
+    one left-padded model.generate() call (max_batch_size=1 disables it).
     """
 
-    def __init__(self, model_name: str = "EleutherAI/gpt-neo-125M", max_new_tokens: int = 128):
+    def __init__(self, model_name: str = "EleutherAI/gpt-neo-125M", max_new_tokens: int = 128,
+                 max_batch_size: int = None, batch_wait_ms: int = None, num_threads: int = None):
         self.model_name = model_name
         self.max_new_tokens = max_new_tokens
         self.tokenizer = None
         self.model = None
         self.device = "cpu"
 
+        self.max_batch_size = max_batch_size or env_int("LOCAL_MAX_BATCH_SIZE", 8)
+        self.batch_wait_ms = batch_wait_ms if batch_wait_ms is not None else env_int("LOCAL_BATCH_WAIT_MS", 10)
+        self.num_threads = num_threads or env_int("LOCAL_NUM_THREADS")
+
+        self._load_lock = threading.Lock()
+        self._batcher = DynamicBatcher(
+            self.generate_many,
+            max_batch_size=self.max_batch_size,
+            max_wait_ms=self.batch_wait_ms,
+        )
+
     def load(self):
         """Load the local HF model + tokenizer (only once)."""
-        if self.tokenizer is not None and self.model is not None:
-            return
+        with self._load_lock:
+            if self.tokenizer is not None and self.model is not None:
+                return
 
-        print(f"Loading local model: {self.model_name} ...")
-        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-        self.model = AutoModelForCausalLM.from_pretrained(self.model_name)
-        self.model.to(self.device)
-        print("Local model loaded successfully.")
+            if self.num_threads:
+                torch.set_num_threads(self.num_threads)
 
-    def generate(self, prompt: str) -> str:
-        """Generate text from the local model."""
+            print(f"Loading local model: {self.model_name} ...")
+            tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+
+            # Decoder-only models must be padded on the left for batching
+            tokenizer.padding_side = "left"
+            if tokenizer.pad_token is None:
+                tokenizer.pad_token = tokenizer.eos_token
+
+            self.model = AutoModelForCausalLM.from_pretrained(self.model_name)
+            self.model.to(self.device)
+            self.model.eval()
+            self.tokenizer = tokenizer
+            print("Local model loaded successfully.")
+
+    def generate_many(self, prompts):
+        """Generate text for several prompts in one padded batch."""
         if self.tokenizer is None or self.model is None:
             raise RuntimeError("LocalGenerator not loaded. Call .load() first.")
 
-        inputs = self.tokenizer(prompt, return_tensors="pt").to(self.device)
+        inputs = self.tokenizer(list(prompts), return_tensors="pt", padding=True).to(self.device)
 
         with torch.no_grad():
             outputs = self.model.generate(
@@ -42,7 +74,20 @@ class LocalGenerator:
                 do_sample=True,
                 temperature=0.8,
                 top_p=0.95,
+                pad_token_id=self.tokenizer.pad_token_id,
             )
 
-        text = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-        return text
+        return self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+
+    def generate(self, prompt: str, info: dict = None) -> str:
+        """Generate text from the local model."""
+        if self.tokenizer is None or self.model is None:
+            raise RuntimeError("LocalGenerator not loaded. Call .load() first.")
+
+        if info is not None:
+            info["model"] = self.model_name
+
+        if self.max_batch_size <= 1:
+            return self.generate_many([prompt])[0]
+
+        return self._batcher(prompt)
@@ -0,0 +1,180 @@
+# src/matcher.py
+# Shared multi-pattern matcher used by ContentFilter and EthicalFilter.
+
+import re
+import json
+from collections import namedtuple
+
+Match = namedtuple("Match", ["term", "category", "start", "end"])
+
+
+def _trie_regex(terms):
+    """
+    Build one regex from a trie of the terms, so common prefixes are
+    only tried once ("harm|harmful" -> "harm(?:ful)?").
+    Longer terms win because every optional branch is greedy.
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node):
+        is_end = "" in node
+        branches = [
+            re.escape(ch) + build(child)
+            for ch, child in sorted(node.items()) if ch != ""
+        ]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not is_end:
+            return branches[0]
+        body = "(?:" + "|".join(branches) + ")"
+        return body + "?" if is_end else body
+
+    return build(trie)
+
+
+class PatternMatcher:
+    """
+    Compiled blocklist matcher: scans each text once, whatever the
+    number of terms, and reports term, category and position.
+
+    Matches must start on a word boundary ("harm" does not match
+    "pharmacy", "kill" does not match "skills"). With whole_words=False
+    (default) a term still matches inflected forms ("attacking");
+    whole_words=True also requires a boundary after the term.
+    """
+
+    def __init__(self, terms, whole_words=False, default_category="blocked"):
+        # terms: list of words, or dict word -> category
+        if isinstance(terms, dict):
+            items = terms.items()
+        else:
+            items = ((t, default_category) for t in terms)
+
+        self.categories = {}
+        for term, category in items:
+            term = term.strip().lower()
+            if term and term not in self.categories:
+                self.categories[term] = category
+
+        self.terms = list(self.categories)
+        self.whole_words = whole_words
+
+        if self.terms:
+            end = r"(?!\w)" if whole_words else ""
+            body = _trie_regex(self.terms)
+            self.pattern = re.compile(rf"(?<!\w){body}{end}", re.IGNORECASE)
+        else:
+            self.pattern = re.compile(r"(?!)")   # never matches
+
+        self.max_term_length = max((len(t) for t in self.terms), default=0)
+
+        # Terms that are the prefix of a longer term ("harm" / "harmful"):
+        # in a stream they can only be reported once the longer one is ruled out
+        ordered = sorted(self.terms)
+        self.extendable = {
+            a for a, b in zip(ordered, ordered[1:]) if b.startswith(a)
+        }
+
+    # ---------------------------------------------------------
+    # Load a blocklist file
+    #   .json → list of words or {"word": "category"}
+    #   other → one "word" or "word,category" per line, # comments
+    # ---------------------------------------------------------
+    @classmethod
+    def from_file(cls, path, whole_words=False, default_category="blocked"):
+        with open(path, "r", encoding="utf-8") as f:
+            if path.endswith(".json"):
+                return cls(json.load(f), whole_words, default_category)
+
+            terms = {}
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                term, _, category = line.partition(",")
+                terms[term.strip()] = category.strip() or default_category
+
+        return cls(terms, whole_words, default_category)
+
+    def _match(self, m):
+        term = m.group(0).lower()
+        return Match(term, self.categories.get(term, "blocked"), m.start(), m.end())
+
+    # ---------------------------------------------------------
+    # Single pass over the text → list of Match
+    # ---------------------------------------------------------
+    def scan(self, text):
+        return [self._match(m) for m in self.pattern.finditer(text)]
+
+    def matched_terms(self, text):
+        """Distinct matched terms, in order of first appearance."""
+        return list(dict.fromkeys(m.term for m in self.scan(text)))
+
+    def check_many(self, texts):
+        """Batch API: list of Match lists, one per text."""
+        return [self.scan(text) for text in texts]
+
+    def stream_scanner(self):
+        """Incremental scanner for text that arrives in chunks."""
+        return StreamScanner(self)
+
+
+class StreamScanner:
+    """
+    Scans streamed text chunk by chunk with the same rules as
+    PatternMatcher.scan(): terms split across chunk boundaries are found,
+    and every match is reported once, with absolute positions.
+    Only the last few characters are kept between chunks.
+    """
+
+    def __init__(self, matcher):
+        self.matcher = matcher
+        # Longest term + 1 char of context for the word-boundary check
+        self.keep = matcher.max_term_length + 1
+        self.tail = ""
+        self.offset = 0          # absolute position of tail[0]
+        self._reported = set()   # absolute start positions already reported
+
+    def _scan(self, window, final):
+        # Skip window[0] when it is only context kept from a previous chunk
+        start = 1 if self.offset > 0 else 0
+        found = []
+
+        for m in self.matcher.pattern.finditer(window, start):
+            begin = self.offset + m.start()
+            if begin in self._reported:
+                continue
+            # A match that may still grow with the next chunk: wait
+            if not final:
+                if self.matcher.whole_words and m.end() == len(window):
+                    continue
+                term = m.group(0).lower()
+                if term in self.matcher.extendable and \
+                        m.start() + self.matcher.max_term_length > len(window):
+                    continue
+
+            self._reported.add(begin)
+            match = self.matcher._match(m)
+            found.append(match._replace(start=begin, end=self.offset + m.end()))
+
+        return found
+
+    def feed(self, chunk):
+        """Add a chunk → list of new Match objects."""
+        window = self.tail + chunk
+        found = self._scan(window, final=False)
+
+        cut = max(0, len(window) - self.keep)
+        self.tail = window[cut:]
+        self.offset += cut
+        self._reported = {p for p in self._reported if p >= self.offset}
+        return found
+
+    def finish(self):
+        """End of stream → matches that were waiting for more text."""
+        return self._scan(self.tail, final=True)
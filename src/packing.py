@@ -0,0 +1,93 @@
+# src/packing.py
+# Prompt packing: several short prompts answered by one chat completion
+# with JSON output, split back into one answer per prompt.
+
+import json
+
+from .utils import estimate_tokens
+
+PACK_INSTRUCTIONS = (
+    "You will receive a JSON object with a list of independent prompts. "
+    "Answer every prompt as if it had been asked on its own. "
+    'Reply only with a JSON object of the form {"answers": [{"id": <id>, "answer": "<text>"}]} '
+    "containing exactly one answer per prompt id."
+)
+
+
+def pack_items(items, token_budget=1000, max_items=20, max_prompt_tokens=100):
+    """
+    Group consecutive (key, prompt) items into packs: at most `max_items`
+    prompts and `token_budget` estimated prompt tokens per pack. Prompts
+    longer than `max_prompt_tokens` always get a pack of their own.
+    Input order is kept (flattening the packs gives back `items`).
+    """
+    packs = []
+    current, used = [], 0
+
+    for item in items:
+        tokens = estimate_tokens(item[1])
+
+        if tokens > max_prompt_tokens:
+            if current:
+                packs.append(current)
+                current, used = [], 0
+            packs.append([item])
+            continue
+
+        if current and (used + tokens > token_budget or len(current) >= max_items):
+            packs.append(current)
+            current, used = [], 0
+
+        current.append(item)
+        used += tokens
+
+    if current:
+        packs.append(current)
+    return packs
+
+
+def build_packed_messages(prompts):
+    """Chat messages asking for all `prompts` at once (ids = list positions)."""
+    payload = {"prompts": [{"id": i, "prompt": p} for i, p in enumerate(prompts)]}
+    return [
+        {"role": "system", "content": PACK_INSTRUCTIONS},
+        {"role": "user", "content": json.dumps(payload, ensure_ascii=False)},
+    ]
+
+
+def parse_packed_answers(text, count):
+    """
+    Split a packed JSON reply → list of `count` answers. Items that are
+    missing or malformed are None (the caller retries them one by one).
+    """
+    answers = [None] * count
+    if not text:
+        return answers
+
+    text = text.strip()
+    if text.startswith("```"):
+        # Tolerate a fenced ```json block
+        text = text.strip("`")
+        text = text[text.find("{"):]
+
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return answers
+
+    items = data.get("answers") if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        return answers
+
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        try:
+            i = int(item.get("id"))
+        except (TypeError, ValueError):
+            continue
+        answer = item.get("answer")
+        if 0 <= i < count and isinstance(answer, str) and answer.strip():
+            answers[i] = answer
+
+    return answers
@@ -0,0 +1,261 @@
+# src/parquet_sink.py
+# Columnar results sink: every batch of results becomes Parquet files in a
+# hive-partitioned dataset (date=YYYY-MM-DD/flagged=true|false), queried
+# with Arrow filters + column projection instead of full JSON loads.
+#
+#   sink = ParquetSink("data/results_parquet")
+#   sink.write(results, run_id)      # a batch: written now
+#   sink.add(results, run_id)        # single prompts: buffered, written in groups
+#   sink.query(columns=["prompt", "flagged_words"], flagged=True, days=7)
+
+import os
+import json
+import time
+import uuid
+import datetime
+import threading
+
+from .backends import get_backend
+from .utils import env_int
+
+# Fields with their own column; anything else goes to "extra" (JSON)
+KNOWN_FIELDS = {
+    "run_id", "timestamp", "prompt", "generated_text", "flagged", "flagged_words",
+    "model", "cached", "error", "usage",
+}
+
+
+def _schema():
+    pa = get_backend("pyarrow")
+    return pa.schema([
+        ("run_id", pa.string()),
+        ("timestamp", pa.timestamp("us")),
+        ("prompt", pa.string()),
+        ("generated_text", pa.string()),
+        ("flagged_words", pa.list_(pa.string())),
+        ("model", pa.string()),
+        ("cached", pa.bool_()),
+        ("error_type", pa.string()),
+        ("error_message", pa.string()),
+        ("prompt_tokens", pa.int64()),
+        ("completion_tokens", pa.int64()),
+        ("generate_ms", pa.float64()),
+        ("extra", pa.string()),
+        # Partition columns
+        ("date", pa.string()),
+        ("flagged", pa.bool_()),
+    ])
+
+
+def _row(record, run_id=None):
+    """Result record → flat row matching _schema()."""
+    try:
+        timestamp = datetime.datetime.fromisoformat(record["timestamp"])
+    except (KeyError, TypeError, ValueError):
+        timestamp = datetime.datetime.now()
+
+    error = record.get("error") or {}
+    usage = record.get("usage") or {}
+    timings = record.get("timings") or {}
+    extra = {k: v for k, v in record.items() if k not in KNOWN_FIELDS}
+
+    return {
+        "run_id": record.get("run_id", run_id),
+        "timestamp": timestamp,
+        "prompt": record.get("prompt"),
+        "generated_text": record.get("generated_text"),
+        "flagged_words": list(record.get("flagged_words") or []),
+        "model": record.get("model"),
+        "cached": record.get("cached"),
+        "error_type": error.get("type"),
+        "error_message": error.get("message"),
+        "prompt_tokens": usage.get("prompt_tokens"),
+        "completion_tokens": usage.get("completion_tokens"),
+        "generate_ms": timings.get("generate_ms"),
+        "extra": json.dumps(extra, ensure_ascii=False) if extra else None,
+        "date": timestamp.date().isoformat(),
+        "flagged": bool(record.get("flagged")),
+    }
+
+
+class ParquetSink:
+    """
+    Batches go straight to Parquet (write). Single prompts (bot, CLI) are
+    buffered (add) and written every `flush_every` records or once the
+    oldest is `flush_interval` seconds old, so the dataset doesn't fill
+    up with 1-row files. compact() merges the small files of a partition.
+    """
+
+    def __init__(self, folder="data/results_parquet", flush_every=500, flush_interval=300):
+        self.folder = folder
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+
+        self._buffer = []            # rows (see _row) not written yet
+        self._buffered_since = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """RESULTS_PARQUET_PATH=<folder> enables the sink (None when unset)."""
+        folder = os.getenv("RESULTS_PARQUET_PATH")
+        if not folder:
+            return None
+        return cls(
+            folder,
+            flush_every=env_int("RESULTS_PARQUET_FLUSH_EVERY", 500),
+            flush_interval=env_int("RESULTS_PARQUET_FLUSH_INTERVAL", 300),
+        )
+
+    def _partitioning(self):
+        pa = get_backend("pyarrow")
+        ds = get_backend("pyarrow_dataset")
+        return ds.partitioning(
+            pa.schema([("date", pa.string()), ("flagged", pa.bool_())]), flavor="hive"
+        )
+
+    # ---------------------------------------------------------
+    # Write one batch of results (one file per partition touched)
+    # ---------------------------------------------------------
+    def write(self, records, run_id=None):
+        rows = [_row(r, run_id) for r in records if "timestamp" in r]
+        return self._write_rows(rows, run_id or "batch")
+
+    def _write_rows(self, rows, name):
+        if not rows:
+            return 0
+
+        pa = get_backend("pyarrow")
+        ds = get_backend("pyarrow_dataset")
+
+        table = pa.Table.from_pylist(rows, schema=_schema())
+        ds.write_dataset(
+            table,
+            self.folder,
+            format="parquet",
+            partitioning=self._partitioning(),
+            # Unique names: batches never overwrite each other
+            basename_template=f"part-{name}-{uuid.uuid4().hex[:8]}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+        return len(rows)
+
+    # ---------------------------------------------------------
+    # Buffered writes for single prompts
+    # ---------------------------------------------------------
+    def add(self, records, run_id=None):
+        rows = [_row(r, run_id) for r in records if "timestamp" in r]
+        with self._lock:
+            if rows and not self._buffer:
+                self._buffered_since = time.monotonic()
+            self._buffer.extend(rows)
+
+            due = len(self._buffer) >= self.flush_every or (
+                self._buffer and time.monotonic() - self._buffered_since >= self.flush_interval
+            )
+        if due:
+            self.flush()
+        return len(rows)
+
+    def flush(self):
+        """Write the buffered rows as one file per partition."""
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+            # Written under the lock: a failed write puts the rows back
+            try:
+                return self._write_rows(rows, "buffer")
+            except Exception:
+                self._buffer = rows + self._buffer
+                raise
+
+    # ---------------------------------------------------------
+    # Merge the files of every partition into one
+    # (run it while nothing else writes to the dataset)
+    # ---------------------------------------------------------
+    def compact(self, min_files=2):
+        """→ number of small files merged away."""
+        self.flush()
+        if not os.path.isdir(self.folder):
+            return 0
+
+        pa = get_backend("pyarrow")
+        pq = get_backend("pyarrow_parquet")
+
+        removed = 0
+        for folder, _, files in os.walk(self.folder):
+            parts = sorted(f for f in files if f.endswith(".parquet"))
+            if len(parts) < min_files:
+                continue
+
+            paths = [os.path.join(folder, f) for f in parts]
+            table = pa.concat_tables([pq.read_table(p) for p in paths])
+
+            # Hidden temp name (skipped by readers), then an atomic rename
+            temp = os.path.join(folder, f".compact-{uuid.uuid4().hex[:8]}")
+            pq.write_table(table, temp)
+            os.replace(temp, os.path.join(folder, f"part-compacted-{uuid.uuid4().hex[:8]}.parquet"))
+            for path in paths:
+                os.remove(path)
+            removed += len(paths) - 1
+
+        return removed
+
+    def import_jsonl(self, path, chunk_size=10000):
+        """Backfill from a ResultsStore JSONL log, chunk by chunk."""
+        written = 0
+        chunk = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    chunk.append(json.loads(line))
+                if len(chunk) >= chunk_size:
+                    written += self.write(chunk)
+                    chunk = []
+        return written + self.write(chunk)
+
+    # ---------------------------------------------------------
+    # Query: partition pruning + predicate pushdown + projection
+    # ---------------------------------------------------------
+    def dataset(self):
+        ds = get_backend("pyarrow_dataset")
+        return ds.dataset(
+            self.folder, format="parquet", schema=_schema(), partitioning=self._partitioning()
+        )
+
+    def query(self, columns=None, flagged=None, days=None, since=None, run_id=None,
+              model=None, filter=None, as_pandas=False):
+        """
+        → pyarrow.Table (or DataFrame) of the matching results.
+        columns: only read these columns (None = all)
+        flagged: True / False / None (both)
+        days / since: results of the last N days / since a datetime
+        filter: extra pyarrow.dataset expression, ANDed with the rest
+        """
+        self.flush()
+        if not os.path.isdir(self.folder):
+            table = _schema().empty_table()
+            table = table.select(columns) if columns else table
+            return table.to_pandas() if as_pandas else table
+
+        ds = get_backend("pyarrow_dataset")
+        expression = filter
+
+        def both(condition):
+            return condition if expression is None else expression & condition
+
+        if days is not None:
+            since = datetime.datetime.now() - datetime.timedelta(days=days)
+        if since is not None:
+            # "date" prunes whole partitions, "timestamp" the rest
+            expression = both(ds.field("date") >= since.date().isoformat())
+            expression = both(ds.field("timestamp") >= since)
+        if flagged is not None:
+            expression = both(ds.field("flagged") == flagged)
+        if run_id is not None:
+            expression = both(ds.field("run_id") == run_id)
+        if model is not None:
+            expression = both(ds.field("model") == model)
+
+        table = self.dataset().to_table(columns=columns, filter=expression)
+        return table.to_pandas() if as_pandas else table
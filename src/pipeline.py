@@ -1,41 +1,181 @@
 # src/pipeline.py
-import json
+import os
+import time
+import atexit
 import datetime
-import pandas as pd
-
-from .api_generator import APIGenerator
-
-# Railway can't install transformers -> disable Summarizer cleanly
-try:
-    from .summarizer import Summarizer
-except Exception:
-    Summarizer = None
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
+# Heavy backends (pandas, openai, transformers) are imported on first use
+from .backends import get_backend, backend_available
 from .ethical_filter import EthicalFilter
 from .content_filter import ContentFilter
-from .utils import save_json, load_default_prompts
+from .rate_limiter import RateLimiter
+from .job_journal import JobJournal
+from .batch_api import BatchRunner, OpenAIBatchBackend, LocalBatchBackend
+from .results_store import ResultsStore
+from .parquet_sink import ParquetSink
+from .chat_history import ChatHistory
+from .packing import pack_items
+from .ingest import iter_csv_chunks, parse_shard
+from .metrics import metrics
+from .utils import load_default_prompts, env_int, estimate_tokens
 
 
 class ContentPipeline:
-    def __init__(self, use_api=True):
-        self.generator = APIGenerator() if use_api else None
+    def __init__(self, use_api=True, max_workers=None,
+                 requests_per_minute=None, tokens_per_minute=None, summarize=None,
+                 early_abort=None, prompt_policy=None):
+        # Generator is created on first use (see the `generator` property)
+        self.use_api = use_api
+        self._generator = None
+        self._summarizer = None
+        self._chat_history = None
+        self._lazy_lock = threading.Lock()
+
         self.filter = ContentFilter()
+        self.ethical_filter = EthicalFilter()
         self.models_loaded = False
         self.last_results = []
 
-        # Summarizer disabled on Railway
-        self.summarizer = Summarizer() if Summarizer else None
+        # Append-only results history (JSONL)
+        self.results_store = ResultsStore(
+            os.getenv("RESULTS_PATH", "last_results.jsonl"),
+            flush_every=env_int("RESULTS_FLUSH_EVERY", 50),
+        )
+        # Optional columnar copy for analytics (RESULTS_PARQUET_PATH, needs pyarrow)
+        self.parquet_sink = ParquetSink.from_env()
+        if self.parquet_sink is not None:
+            # Buffered single-prompt rows are written on exit
+            atexit.register(self.flush_parquet)
+
+        # Concurrency: max prompts in flight + API budgets (None = unlimited)
+        self.max_workers = max_workers or env_int("PIPELINE_MAX_WORKERS", 8)
+        self.rate_limiter = RateLimiter(
+            requests_per_minute or env_int("PIPELINE_RPM"),
+            tokens_per_minute or env_int("PIPELINE_TPM"),
+        )
+
+        # Optional summary stage (PIPELINE_SUMMARIZE=true), model loaded on
+        # first use. Railway can't install transformers -> stays disabled.
+        if summarize is None:
+            summarize = os.getenv("PIPELINE_SUMMARIZE", "false").lower() == "true"
+        self.summarize = summarize
+
+        # Early abort: stream every generation through the content filter
+        # and stop paying for tokens as soon as a blocking term appears.
+        # ABORT_CATEGORIES limits which categories abort (empty = all).
+        if early_abort is None:
+            early_abort = os.getenv("PIPELINE_EARLY_ABORT", "false").lower() == "true"
+        self.early_abort = early_abort
+        self.abort_categories = {
+            c.strip() for c in os.getenv("ABORT_CATEGORIES", "").split(",") if c.strip()
+        }
+
+        # Prompt screening before generation (PROMPT_SCREENING):
+        #   off   → never screen
+        #   skip  → blocked prompts are not sent to the API at all
+        #   flag  → generate anyway, result is flagged
+        #   route → generate with the cheaper SCREENING_ROUTE_MODEL, flagged
+        self.prompt_policy = (prompt_policy or os.getenv("PROMPT_SCREENING", "off")).lower()
+        if self.prompt_policy not in ("off", "skip", "flag", "route"):
+            raise ValueError(f"Unknown PROMPT_SCREENING policy: {self.prompt_policy}")
+        self.route_model = os.getenv("SCREENING_ROUTE_MODEL", "gpt-4.1-nano")
+
+    # ---------------------------------------------------------
+    # Lazily constructed backends
+    # ---------------------------------------------------------
+    @property
+    def generator(self):
+        if self._generator is None:
+            with self._lazy_lock:
+                if self._generator is None:
+                    # API generator, or local HF model (needs transformers + torch)
+                    name = "api_generator" if self.use_api else "local_generator"
+                    self._generator = get_backend(name)()
+        return self._generator
+
+    @property
+    def summarizer(self):
+        if not self.summarize:
+            return None
+
+        if self._summarizer is None:
+            with self._lazy_lock:
+                if self._summarizer is None:
+                    if not backend_available("summarizer"):
+                        print("[PIPELINE] Summarizer unavailable (transformers not installed)")
+                        self.summarize = False
+                        return None
+
+                    self._summarizer = get_backend("summarizer")(
+                        num_beams=env_int("SUMMARIZER_NUM_BEAMS", 4),
+                        batch_size=env_int("SUMMARIZER_BATCH_SIZE", 8),
+                        quantize=os.getenv("SUMMARIZER_QUANTIZE", "false").lower() == "true",
+                    )
+        return self._summarizer
+
+    @property
+    def chat_history(self):
+        # Only the bot needs it: the SQLite file is opened on first use
+        if self._chat_history is None:
+            with self._lazy_lock:
+                if self._chat_history is None:
+                    self._chat_history = ChatHistory.from_env()
+        return self._chat_history
 
     # ---------------------------------------------
     # Save last results to file + memory
     # ---------------------------------------------
-    def save_last_results(self, results):
+    def save_last_results(self, results, run_id=None, buffered=False):
         try:
-            with open("last_results.json", "w", encoding="utf-8") as f:
-                json.dump(results, f, indent=2)
+            run_id = run_id or ResultsStore.new_run_id()
+            with metrics.timer("write"):
+                self.results_store.append(results, run_id)
+                self.results_store.flush()
+            # The store copies records; ours carry the run_id too
+            for result in results:
+                result["run_id"] = run_id
             self.last_results = results
         except Exception as e:
+            metrics.inc("pipeline_errors_total", stage="write")
             print("[PIPELINE] ERROR saving last results:", e)
+        self._export_parquet(results, run_id, buffered)
+        self._export_metrics()
+
+    # ---------------------------------------------------------
+    # Parquet copy of a finished batch (RESULTS_PARQUET_PATH);
+    # single prompts are buffered into bigger files
+    # ---------------------------------------------------------
+    def _export_parquet(self, results, run_id, buffered=False):
+        if self.parquet_sink is None:
+            return
+        try:
+            with metrics.timer("write_parquet"):
+                if buffered:
+                    self.parquet_sink.add(results, run_id)
+                else:
+                    self.parquet_sink.write(results, run_id)
+        except Exception as e:
+            metrics.inc("pipeline_errors_total", stage="write_parquet")
+            print("[PIPELINE] ERROR writing Parquet results:", e)
+
+    def flush_parquet(self):
+        """Write buffered single-prompt rows now (exit, worker shutdown)."""
+        if self.parquet_sink is None:
+            return
+        try:
+            self.parquet_sink.flush()
+        except Exception as e:
+            print("[PIPELINE] ERROR writing Parquet results:", e)
+
+    # ---------------------------------------------------------
+    # Metrics JSON dump after each run (METRICS_JSON_PATH)
+    # ---------------------------------------------------------
+    def _export_metrics(self):
+        path = os.getenv("METRICS_JSON_PATH")
+        if path:
+            metrics.dump_json(path)
 
     # ---------------------------------------------------------
     # Load models once
@@ -44,11 +184,326 @@ class ContentPipeline:
         if self.models_loaded:
             return
 
-        if self.generator:
+        if hasattr(self.generator, "load"):
+            self.generator.load()
+        else:
             print("[API] No local model to load (OK)")
 
         self.models_loaded = True
 
+    # ---------------------------------------------------------
+    # Screen the prompt itself → decision dict (None when off)
+    # ---------------------------------------------------------
+    def _screen_prompt(self, prompt):
+        if self.prompt_policy == "off":
+            return None
+
+        words = self.ethical_filter.report(prompt)["flagged_words"]
+        words += [w for w in self.filter.check(prompt)[1] if w not in words]
+
+        decision = self.prompt_policy if words else "pass"
+        # Only the API generator can switch models
+        if decision == "route" and not getattr(self.generator, "supports_model_override", False):
+            decision = "flag"
+
+        return {"decision": decision, "matched_words": words}
+
+    # ---------------------------------------------------------
+    # Generate + filter one prompt (no file I/O, thread-safe)
+    # ---------------------------------------------------------
+    def _build_result(self, prompt, on_delta=None):
+        timings = {}
+        with metrics.timer("screen", timings):
+            screening = self._screen_prompt(prompt)
+
+        if screening and screening["decision"] == "skip":
+            # Doomed prompt: no API call at all
+            metrics.inc("pipeline_prompts_skipped_total")
+            result = self._make_record(prompt, "", timings)
+            result["flagged"] = True
+            result["flagged_words"] = screening["matched_words"]
+            result["prompt_screening"] = screening
+            result["timings"] = timings
+            return result
+
+        result = self._generate_record(prompt, on_delta, screening, timings)
+        metrics.inc("pipeline_results_total", flagged=str(result["flagged"]).lower())
+
+        if screening:
+            result["prompt_screening"] = screening
+            if screening["decision"] in ("flag", "route"):
+                result["flagged"] = True
+                result["flagged_words"] += [
+                    w for w in screening["matched_words"] if w not in result["flagged_words"]
+                ]
+
+        return result
+
+    def _generate_record(self, prompt, on_delta=None, screening=None, timings=None):
+        timings = {} if timings is None else timings
+
+        with metrics.timer("rate_limit_wait", timings):
+            self.rate_limiter.acquire(
+                estimate_tokens(prompt) + getattr(self.generator, "max_tokens", 0)
+            )
+
+        info = {}
+        options = {"info": info}
+        if screening and screening["decision"] == "route":
+            options["model"] = self.route_model
+
+        streaming = on_delta is not None or self.early_abort
+        if not (streaming and hasattr(self.generator, "stream")):
+            error = None
+            with metrics.timer("generate", timings):
+                try:
+                    generated = self.generator.generate(prompt, **options)
+                except Exception as e:
+                    generated, error = "", e
+            result = self._make_record(prompt, generated, timings)
+            self._attach_info(result, info, timings)
+            return self._attach_error(result, error)
+
+        # Streaming: on_delta(text) is called for every chunk as it arrives
+        scanner = self.filter.stream_scanner() if self.early_abort else None
+        parts = []
+        abort_match = None
+        error = None
+
+        with metrics.timer("generate", timings):
+            started = time.perf_counter()
+            stream = self.generator.stream(prompt, **options)
+            try:
+                for delta in stream:
+                    if not parts:
+                        # Time to first token: the latency users actually see
+                        timings["first_token_ms"] = round((time.perf_counter() - started) * 1000, 2)
+                    parts.append(delta)
+                    if on_delta is not None:
+                        on_delta(delta)
+
+                    if scanner is not None:
+                        abort_match = self._blocking_match(scanner.feed(delta))
+                        if abort_match is not None:
+                            # Closing the generator closes the HTTP stream
+                            stream.close()
+                            metrics.inc("pipeline_aborted_total")
+                            break
+            except Exception as e:
+                # Partial text (if any) is kept, the record carries the error
+                error = e
+
+        result = self._make_record(prompt, "".join(parts), timings)
+        self._attach_info(result, info, timings)
+        self._attach_error(result, error)
+
+        if abort_match is not None:
+            result["aborted"] = True
+            result["abort_reason"] = (
+                f"blocked term '{abort_match.term}' ({abort_match.category}) "
+                f"at char {abort_match.start}"
+            )
+
+        return result
+
+    # ---------------------------------------------------------
+    # Packed generation: several short prompts in one JSON request
+    # ---------------------------------------------------------
+    def _build_packed(self, prompts):
+        """
+        Results for `prompts` in order. Prompts the screening policy acts
+        on, and answers that could not be split out of the JSON reply,
+        go through the normal single-prompt path.
+        """
+        screenings = [self._screen_prompt(p) for p in prompts]
+        packed = [i for i, s in enumerate(screenings) if s is None or s["decision"] == "pass"]
+        results = [None] * len(prompts)
+
+        if len(packed) > 1:
+            timings = {}
+            with metrics.timer("rate_limit_wait", timings):
+                self.rate_limiter.acquire(
+                    sum(estimate_tokens(prompts[i]) for i in packed)
+                    + self.generator.max_tokens * len(packed)
+                )
+
+            info = {}
+            with metrics.timer("generate", timings):
+                answers = self.generator.generate_packed([prompts[i] for i in packed], info=info)
+
+            for i, answer in zip(packed, answers):
+                if answer is None:
+                    metrics.inc("pipeline_pack_fallbacks_total")
+                    continue
+
+                item_timings = dict(timings)
+                result = self._make_record(prompts[i], answer, item_timings)
+                self._attach_info(result, info, item_timings)
+                # Token usage belongs to the whole pack (see the metrics)
+                result["usage"] = None
+                result["packed"] = len(packed)
+                if screenings[i]:
+                    result["prompt_screening"] = screenings[i]
+                metrics.inc("pipeline_results_total", flagged=str(result["flagged"]).lower())
+                results[i] = result
+
+        return [
+            result if result is not None else self._build_result(prompt)
+            for result, prompt in zip(results, prompts)
+        ]
+
+    def _blocking_match(self, matches):
+        for match in matches:
+            if not self.abort_categories or match.category in self.abort_categories:
+                return match
+        return None
+
+    @staticmethod
+    def _attach_info(result, info, timings):
+        """Per-record instrumentation: model, cache hits, token usage, timings."""
+        result["model"] = info.get("model")
+        result["cached"] = info.get("cached", False)
+        result["coalesced"] = info.get("coalesced", False)
+        result["similar_to"] = info.get("similar_to")
+        result["usage"] = info.get("usage")
+        result["timings"] = timings
+        return result
+
+    # ---------------------------------------------------------
+    # Filter generated text → result record
+    # ---------------------------------------------------------
+    def _make_record(self, prompt, generated, timings=None):
+        with metrics.timer("filter", timings):
+            flagged, words = self.filter.check(generated)
+
+        return {
+            "prompt": prompt,
+            "generated_text": generated,
+            "flagged": flagged,
+            "flagged_words": words,
+            "error": None,
+            "timestamp": datetime.datetime.now().isoformat()
+        }
+
+    @staticmethod
+    def _attach_error(result, error):
+        """Failed generation → "error": {"type", "message"} (None when it worked)."""
+        result["error"] = None if error is None else {
+            "type": getattr(error, "kind", "unknown"),
+            "message": str(error),
+        }
+        return result
+
+    @staticmethod
+    def _is_error(result):
+        return bool(result.get("error"))
+
+    # ---------------------------------------------------------
+    # Summary stage: add "summary" to a list of results in place
+    # ---------------------------------------------------------
+    def _summarize(self, results):
+        if not self.summarizer:
+            return results
+
+        todo = [
+            r for r in results
+            if r["generated_text"] and not self._is_error(r) and "summary" not in r
+        ]
+        # Mini-batch by mini-batch: a model failure (load, OOM...) costs
+        # the summaries, never the generations already paid for
+        size = max(1, self.summarizer.batch_size)
+        for start in range(0, len(todo), size):
+            chunk = todo[start:start + size]
+            error = None
+            try:
+                with metrics.timer("summarize"):
+                    summaries = self.summarizer.summarize_many([r["generated_text"] for r in chunk])
+            except Exception as e:
+                metrics.inc("pipeline_errors_total", stage="summarize")
+                print("[PIPELINE] ERROR summarizing:", e)
+                summaries = [None] * len(chunk)
+                error = {"type": type(e).__name__, "message": str(e)}
+
+            for r, summary in zip(chunk, summaries):
+                r["summary"] = summary
+                if error is not None:
+                    r["summary_error"] = error
+
+        return results
+
+    def _iter_summarized(self, results):
+        """Summarize a result stream in mini-batches, keeping the order."""
+        if not self.summarizer:
+            yield from results
+            return
+
+        pending = []
+        for result in results:
+            pending.append(result)
+            if len(pending) >= self.summarizer.batch_size:
+                yield from self._summarize(pending)
+                pending = []
+
+        yield from self._summarize(pending)
+
+    # ---------------------------------------------------------
+    # Process many prompts concurrently, yield in input order
+    # ---------------------------------------------------------
+    def _iter_many(self, prompts, max_workers=None, func=None):
+        func = func or self._build_result
+        workers = min(max_workers or self.max_workers, len(prompts))
+
+        if workers <= 1:
+            for p in prompts:
+                yield func(p)
+            return
+
+        pool = ThreadPoolExecutor(max_workers=workers)
+        try:
+            # map() yields in submission order, whatever the completion order
+            yield from pool.map(func, prompts)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _process_many(self, prompts, max_workers=None, func=None):
+        return list(self._iter_many(prompts, max_workers=max_workers, func=func))
+
+    # ---------------------------------------------------------
+    # (row, prompt) items → results in item order
+    # on_result(row, prompt, result) sees each result (checkpoints)
+    # ---------------------------------------------------------
+    def _iter_generated(self, items, max_workers=None, pack=None, on_result=None):
+        def finish(row, prompt, result):
+            return on_result(row, prompt, result) if on_result else result
+
+        def work(item):
+            row, prompt = item
+            return finish(row, prompt, self._build_result(prompt))
+
+        def work_pack(group):
+            results = self._build_packed([prompt for _, prompt in group])
+            return [finish(row, prompt, r) for (row, prompt), r in zip(group, results)]
+
+        # Packing (BATCH_PACKING=true): short prompts share one JSON-mode
+        # API request. Only the API generator supports it.
+        if pack is None:
+            pack = os.getenv("BATCH_PACKING", "false").lower() == "true"
+        pack = pack and hasattr(self.generator, "generate_packed")
+
+        if not pack:
+            yield from self._iter_many(items, max_workers=max_workers, func=work)
+            return
+
+        packs = pack_items(
+            items,
+            token_budget=env_int("PACK_TOKEN_BUDGET", 1000),
+            max_items=env_int("PACK_MAX_ITEMS", 20),
+            max_prompt_tokens=env_int("PACK_MAX_PROMPT_TOKENS", 100),
+        )
+        print(f"[PIPELINE] Packing {len(items)} prompts into {len(packs)} requests.")
+        for results in self._iter_many(packs, max_workers=max_workers, func=work_pack):
+            yield from results
+
     # ---------------------------------------------------------
     # Run default prompts
     # ---------------------------------------------------------
@@ -56,25 +511,12 @@ class ContentPipeline:
         self._ensure_models_loaded()
 
         prompts = load_default_prompts()
-        results = []
-
         for p in prompts:
             print(f"[PIPELINE] Processing prompt: {p}")
-            generated = self.generator.generate(p)
-            flagged, words = self.filter.check(generated)
-
-            result = {
-                "prompt": p,
-                "generated_text": generated,
-                "flagged": flagged,
-                "flagged_words": words,
-                "timestamp": datetime.datetime.now().isoformat()
-            }
 
-            results.append(result)
+        results = self._summarize(self._process_many(prompts))
 
-        self.last_results = results
-        save_json("last_results.json", results)
+        self.save_last_results(results)
 
         print("\n[PIPELINE] Completed!")
         print(f"[PIPELINE] {len(results)} items processed.")
@@ -85,41 +527,77 @@ class ContentPipeline:
     # ---------------------------------------------------------
     # Process a single prompt
     # ---------------------------------------------------------
-    def process_single(self, prompt):
+    def process_single(self, prompt, on_delta=None):
         self._ensure_models_loaded()
 
-        generated = self.generator.generate(prompt)
-        flagged, words = self.filter.check(generated)
-
-        result = [{
-            "prompt": prompt,
-            "generated_text": generated,
-            "flagged": flagged,
-            "flagged_words": words,
-            "timestamp": datetime.datetime.now().isoformat()
-        }]
+        result = self._summarize([self._build_result(prompt, on_delta)])
 
-        self.last_results = result
-        save_json("last_results.json", result)
+        self.save_last_results(result, buffered=True)
         return result
 
     # ---------------------------------------------------------
     # Batch CSV processing
     # ---------------------------------------------------------
-    def run_batch_csv(self, csv_path="data/prompts.csv"):
+    def run_batch_csv(self, csv_path="data/prompts.csv", max_workers=None, resume=None,
+                      pack=None):
         try:
-            df = pd.read_csv(csv_path)
+            self._ensure_models_loaded()
+
+            df = get_backend("pandas").read_csv(csv_path)
 
             if "prompt" not in df.columns:
                 raise ValueError("CSV must contain a 'prompt' column")
 
-            prompts = df["prompt"].dropna().tolist()
-
+            # (row index, prompt) pairs: the row index identifies the job item
+            rows = [(int(row), p) for row, p in df["prompt"].dropna().items()]
+
+            # Checkpoint journal: resume an interrupted run of this CSV
+            if resume is None:
+                resume = os.getenv("BATCH_RESUME", "true").lower() == "true"
+
+            journal = JobJournal(JobJournal.job_id_for(csv_path))
+            if resume:
+                done = journal.load()
+            else:
+                journal.clear()
+                done = {}
+
+            todo = [(row, p) for row, p in rows if not journal.is_done(done, row, p)]
+            if len(todo) < len(rows):
+                print(f"[PIPELINE] Resuming batch: {len(rows) - len(todo)}/{len(rows)} prompts already done.")
+
+            def checkpoint(row, prompt, result):
+                # API errors are not checkpointed so a resume retries them
+                if not self._is_error(result):
+                    journal.record(row, prompt, result)
+                return result
+
+            fresh = self._iter_generated(todo, max_workers, pack, on_result=checkpoint)
+
+            def ordered():
+                for row, prompt in rows:
+                    if journal.is_done(done, row, prompt):
+                        yield done[row]["result"]
+                    else:
+                        yield next(fresh)
+
+            # Records are appended in CSV order (buffered writes)
+            run_id = ResultsStore.new_run_id()
             results = []
-            for prompt in prompts:
-                results.extend(self.process_single(prompt))
+            for result in self._iter_summarized(ordered()):
+                result["run_id"] = run_id
+                with metrics.timer("write"):
+                    self.results_store.append([result], run_id)
+                results.append(result)
+
+            with metrics.timer("write"):
+                self.results_store.flush()
+            self.last_results = results
+            self._export_parquet(results, run_id)
+            self._export_metrics()
 
-            self.save_last_results(results)
+            # Whole batch done: next run starts from scratch
+            journal.clear()
             return results
 
         except Exception as e:
@@ -130,17 +608,152 @@ class ContentPipeline:
             }]
 
     # ---------------------------------------------------------
-    # Load last results from JSON
+    # Streaming batch for very large CSVs: chunked reads, results
+    # yielded as they are written, optional shard "i/N" of the rows.
+    # Memory stays flat: nothing is kept beyond the current chunk.
     # ---------------------------------------------------------
-    def get_last_results(self, limit=None):
+    def iter_batch_csv(self, csv_path="data/prompts.csv", chunk_size=None, shard=None,
+                       max_workers=None, resume=None, pack=None):
         try:
-            with open("last_results.json", "r", encoding="utf-8") as f:
-                data = json.load(f)
+            self._ensure_models_loaded()
+
+            chunk_size = chunk_size or env_int("BATCH_CHUNK_SIZE", 1000)
+            shard = parse_shard(shard)
+
+            # One checkpoint line per finished chunk, with the rows that
+            # failed in it: a resumed run skips the chunk but retries those
+            # rows. An interrupted run redoes at most the chunk it was in.
+            if resume is None:
+                resume = os.getenv("BATCH_RESUME", "true").lower() == "true"
+
+            # Edited CSV (new size / mtime) → new job, old checkpoints unused
+            job_id = (f"{JobJournal.job_id_for(csv_path)}-{JobJournal.fingerprint(csv_path)}"
+                      f"-stream-{chunk_size}")
+            if shard is not None:
+                job_id += f"-shard{shard[0]}of{shard[1]}"
+            journal = JobJournal(job_id)
+            if resume:
+                done_chunks = journal.load_chunks()
+            else:
+                journal.clear()
+                done_chunks = {}
+            if done_chunks:
+                print(f"[PIPELINE] Resuming streaming batch after {len(done_chunks)} chunks.")
+
+            run_id = ResultsStore.new_run_id()
+            failures = 0
+            for index, rows in enumerate(iter_csv_chunks(csv_path, chunk_size, shard)):
+                if index in done_chunks:
+                    rows = [(row, p) for row, p in rows if row in done_chunks[index]]
+                if not rows:
+                    continue
+
+                results = []
+                fresh = self._iter_generated(rows, max_workers, pack)
+                for (row, _), result in zip(rows, self._iter_summarized(fresh)):
+                    # Row number: lets shards be merged back in CSV order
+                    result["row"] = row
+                    result["run_id"] = run_id
+                    results.append(result)
+
+                with metrics.timer("write"):
+                    self.results_store.append(results, run_id)
+                    self.results_store.flush()
+                self._export_parquet(results, run_id)
+                failed = [r["row"] for r in results if self._is_error(r)]
+                journal.record_chunk(index, failed)
+                failures += len(failed)
+
+                yield from results
+
+            self._export_metrics()
+            # Failed rows stay journaled: running the batch again retries them
+            if not failures:
+                journal.clear()
 
-            if limit is not None:
-                return data[-limit:]
+        except Exception as e:
+            yield {
+                "prompt": "CSV_ERROR",
+                "generated_text": str(e),
+                "flagged": False
+            }
+
+    # ---------------------------------------------------------
+    # Batch API (offline) processing of a CSV
+    # backend: "openai" | "local" (BATCH_BACKEND in .env)
+    # ---------------------------------------------------------
+    def run_batch_api(self, csv_path="data/prompts.csv", backend=None, poll_interval=None):
+        try:
+            df = get_backend("pandas").read_csv(csv_path)
+
+            if "prompt" not in df.columns:
+                raise ValueError("CSV must contain a 'prompt' column")
+
+            rows = [(int(row), p) for row, p in df["prompt"].dropna().items()]
+
+            backend = backend or os.getenv("BATCH_BACKEND", "openai")
+            if backend == "local":
+                # Offline stand-in: no generator (and no API key) needed
+                backend = LocalBatchBackend()
+                model, max_tokens = os.getenv("MODEL_NAME", "gpt-4o-mini"), 300
+            else:
+                if backend == "openai":
+                    backend = OpenAIBatchBackend(self.generator.client)
+                model, max_tokens = self.generator.model, self.generator.max_tokens
+
+            runner = BatchRunner(
+                backend,
+                model=model,
+                max_tokens=max_tokens,
+                poll_interval=poll_interval or env_int("BATCH_POLL_INTERVAL", 30),
+            )
+
+            batch_id, status, outputs = runner.run(
+                [(f"row-{row}", prompt) for row, prompt in rows]
+            )
+
+            # Merge outputs back in CSV order, filters applied as usual
+            results = []
+            for row, prompt in rows:
+                text, error = outputs.get(f"row-{row}", (None, f"no output (batch {status})"))
 
-            return data
+                result = self._make_record(prompt, text or "")
+                result["batch_id"] = batch_id
+                if text is None:
+                    result["error"] = {"type": "batch", "message": str(error)}
+                results.append(result)
 
-        except FileNotFoundError:
-            return []
+            self._summarize(results)
+            self.save_last_results(results)
+            return results
+
+        except Exception as e:
+            return [{
+                "prompt": "BATCH_ERROR",
+                "generated_text": str(e),
+                "flagged": False
+            }]
+
+    # ---------------------------------------------------------
+    # Per-chat history (bot): every chat only sees its own runs
+    # ---------------------------------------------------------
+    def remember_for_chat(self, chat_id, results):
+        """Store a run in the chat's history → run_id."""
+        run_id = next((r["run_id"] for r in results if r.get("run_id")), None) \
+            or ResultsStore.new_run_id()
+        for r in results:
+            r.setdefault("run_id", run_id)
+        self.chat_history.add(chat_id, results, run_id)
+        return run_id
+
+    def get_chat_run(self, chat_id, run_id):
+        return self.chat_history.get_run(chat_id, run_id)
+
+    # ---------------------------------------------------------
+    # Load last run's results: the chat's own history when
+    # chat_id is given, else the end of the shared log
+    # ---------------------------------------------------------
+    def get_last_results(self, limit=None, chat_id=None):
+        if chat_id is not None:
+            return self.chat_history.last_run(chat_id, limit)
+        return self.results_store.last_run(limit)
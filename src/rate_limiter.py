@@ -0,0 +1,75 @@
+# src/rate_limiter.py
+
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Thread-safe requests-per-minute / tokens-per-minute limiter.
+    Every worker calls .acquire(tokens) before hitting the API;
+    the call blocks until both budgets allow the request.
+    A limit of None (or 0) disables that budget.
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None):
+        self.requests_per_minute = requests_per_minute or None
+        self.tokens_per_minute = tokens_per_minute or None
+
+        self._request_budget = float(self.requests_per_minute or 0)
+        self._token_budget = float(self.tokens_per_minute or 0)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    # ---------------------------------------------------------
+    # Refill both buckets proportionally to elapsed time
+    # ---------------------------------------------------------
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+
+        if self.requests_per_minute:
+            self._request_budget = min(
+                self.requests_per_minute,
+                self._request_budget + elapsed * self.requests_per_minute / 60.0
+            )
+
+        if self.tokens_per_minute:
+            self._token_budget = min(
+                self.tokens_per_minute,
+                self._token_budget + elapsed * self.tokens_per_minute / 60.0
+            )
+
+    # ---------------------------------------------------------
+    # Block until one request of `tokens` tokens fits the budget
+    # ---------------------------------------------------------
+    def acquire(self, tokens=0):
+        if not self.requests_per_minute and not self.tokens_per_minute:
+            return
+
+        # A single request larger than the whole budget would wait forever
+        if self.tokens_per_minute:
+            tokens = min(tokens, self.tokens_per_minute)
+
+        while True:
+            with self._lock:
+                self._refill()
+
+                wait = 0.0
+                if self.requests_per_minute and self._request_budget < 1:
+                    missing = 1 - self._request_budget
+                    wait = max(wait, missing * 60.0 / self.requests_per_minute)
+
+                if self.tokens_per_minute and self._token_budget < tokens:
+                    missing = tokens - self._token_budget
+                    wait = max(wait, missing * 60.0 / self.tokens_per_minute)
+
+                if wait == 0.0:
+                    if self.requests_per_minute:
+                        self._request_budget -= 1
+                    if self.tokens_per_minute:
+                        self._token_budget -= tokens
+                    return
+
+            time.sleep(wait)
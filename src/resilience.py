@@ -0,0 +1,160 @@
+# src/resilience.py
+# Classified generation errors, retries with exponential backoff + jitter
+# (honoring Retry-After) and a circuit breaker that fails fast in outages.
+
+import os
+import time
+import random
+import threading
+
+from .metrics import metrics
+from .utils import env_int
+
+
+class GenerationError(Exception):
+    """
+    A failed generation, classified:
+    kind = rate_limit | timeout | connection | server | client | circuit_open | unknown
+    """
+
+    def __init__(self, message, kind="unknown", retryable=False, retry_after=None):
+        super().__init__(message)
+        self.kind = kind
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(GenerationError):
+    def __init__(self, retry_in):
+        super().__init__(f"circuit open, API calls paused for {retry_in:.1f}s", kind="circuit_open")
+
+
+# Error kinds that mean "the service is unhealthy" (count for the breaker)
+OUTAGE_KINDS = ("timeout", "connection", "server")
+
+
+# -----------------------------------------------------------
+# Circuit breaker: closed → open (after N failures) → half-open
+# (one probe call after reset_timeout) → closed again on success
+# -----------------------------------------------------------
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            failure_threshold=env_int("API_CIRCUIT_THRESHOLD", 5),
+            reset_timeout=float(os.getenv("API_CIRCUIT_RESET", "30")),
+        )
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through now."""
+        with self._lock:
+            if self.opened_at is None:
+                return
+
+            retry_in = self.reset_timeout - (time.monotonic() - self.opened_at)
+            if retry_in > 0 or self._probing:
+                raise CircuitOpenError(max(retry_in, 0))
+
+            # Half-open: let exactly one probe through
+            self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                print("[API] Circuit closed: API is answering again")
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            probe_failed = self._probing
+            self._probing = False
+
+            if probe_failed or (self.opened_at is None and self.failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+                metrics.inc("pipeline_circuit_open_total")
+                print(f"[API] Circuit open after {self.failures} failures, "
+                      f"pausing calls for {self.reset_timeout:g}s")
+
+
+# -----------------------------------------------------------
+# Retries with exponential backoff and full jitter
+# -----------------------------------------------------------
+class RetryPolicy:
+    def __init__(self, max_retries=3, base_delay=0.5, max_delay=20.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_retries=env_int("API_MAX_RETRIES", 3),
+            base_delay=float(os.getenv("API_BACKOFF_BASE", "0.5")),
+            max_delay=float(os.getenv("API_BACKOFF_MAX", "20")),
+        )
+
+    def delay(self, attempt, retry_after=None):
+        """Seconds to wait before retry number `attempt` (0-based)."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        # The server knows best: never retry earlier than Retry-After
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def call(self, fn, classify, breaker=None):
+        """
+        Run fn(), retrying retryable errors. Every failure is turned into
+        a GenerationError by classify(exception).
+        """
+        attempt = 0
+        while True:
+            if breaker is not None:
+                breaker.before_call()
+
+            try:
+                result = fn()
+            except Exception as e:
+                error = e if isinstance(e, GenerationError) else classify(e)
+
+                if breaker is not None:
+                    if error.kind in OUTAGE_KINDS:
+                        breaker.record_failure()
+                    else:
+                        # The API answered (e.g. 400 or 429): it is up
+                        breaker.record_success()
+
+                if not error.retryable or attempt >= self.max_retries:
+                    if error is e:
+                        raise
+                    raise error from e
+
+                delay = self.delay(attempt, error.retry_after)
+                metrics.inc("pipeline_retries_total", kind=error.kind)
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            if breaker is not None:
+                breaker.record_success()
+            return result
@@ -0,0 +1,175 @@
+# src/response_cache.py
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+from .utils import env_int
+
+
+class ResponseCache:
+    """
+    Two-tier cache for generated text:
+      1) in-process LRU (OrderedDict) for the hottest entries
+      2) on-disk SQLite table shared across runs / processes
+    Entries expire after `ttl` seconds; the disk tier keeps at most
+    `max_disk_items` rows (least recently used rows are evicted).
+    """
+
+    EVICT_EVERY = 100   # run disk eviction every N writes
+
+    def __init__(self, path="data/response_cache.sqlite3", ttl=7 * 24 * 3600,
+                 max_memory_items=256, max_disk_items=10000):
+        self.path = path
+        self.ttl = ttl
+        self.max_memory_items = max_memory_items
+        self.max_disk_items = max_disk_items
+
+        self.hits = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._memory = OrderedDict()     # key -> (created, value)
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " accessed REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)"
+        )
+        self._db.commit()
+
+    # ---------------------------------------------------------
+    # Build the cache from .env (None when disabled)
+    # ---------------------------------------------------------
+    @classmethod
+    def from_env(cls):
+        if os.getenv("RESPONSE_CACHE", "true").lower() != "true":
+            return None
+
+        return cls(
+            path=os.getenv("RESPONSE_CACHE_PATH", "data/response_cache.sqlite3"),
+            ttl=env_int("RESPONSE_CACHE_TTL", 7 * 24 * 3600),
+            max_memory_items=env_int("RESPONSE_CACHE_MEMORY_ITEMS", 256),
+            max_disk_items=env_int("RESPONSE_CACHE_DISK_ITEMS", 10000),
+        )
+
+    # ---------------------------------------------------------
+    # Stable key: hash of model + messages + generation params
+    # ---------------------------------------------------------
+    @staticmethod
+    def make_key(model, messages, **params):
+        payload = json.dumps(
+            {"model": model, "messages": messages, "params": params},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _expired(self, created):
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def _remember(self, key, created, value):
+        self._memory[key] = (created, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    # ---------------------------------------------------------
+    # Lookup → cached text or None
+    # ---------------------------------------------------------
+    def get(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created, value = entry
+                if not self._expired(created):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    self.memory_hits += 1
+                    return value
+                del self._memory[key]
+
+            row = self._db.execute(
+                "SELECT value, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, created = row
+            if self._expired(created):
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+                self.misses += 1
+                return None
+
+            self._db.execute(
+                "UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key)
+            )
+            self._db.commit()
+            self._remember(key, created, value)
+            self.hits += 1
+            self.disk_hits += 1
+            return value
+
+    # ---------------------------------------------------------
+    # Store a value in both tiers
+    # ---------------------------------------------------------
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, accessed)"
+                " VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._writes += 1
+            if self._writes % self.EVICT_EVERY == 0:
+                self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        if self.ttl is not None:
+            self._db.execute(
+                "DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,)
+            )
+        self._db.execute(
+            "DELETE FROM responses WHERE key IN ("
+            " SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_items,),
+        )
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_items": len(self._memory),
+        }
@@ -0,0 +1,138 @@
+# src/results_store.py
+
+import os
+import json
+import uuid
+import threading
+
+
+class ResultsStore:
+    """
+    Append-only JSONL log of pipeline results.
+    - every record gets the run_id of the run / batch that produced it
+    - writes are buffered and flushed (+ fsync) every `flush_every` records
+    - reads only walk the end of the file, never json.load the whole log
+    """
+
+    BLOCK_SIZE = 64 * 1024
+    LAST_RUN_WINDOW = 10000   # records scanned back for the last run
+
+    def __init__(self, path="last_results.jsonl", flush_every=50, fsync=True):
+        self.path = path
+        self.flush_every = flush_every
+        self.fsync = fsync
+        self._buffer = []
+        self._lock = threading.Lock()
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+    @staticmethod
+    def new_run_id():
+        return uuid.uuid4().hex[:12]
+
+    # ---------------------------------------------------------
+    # Buffer records (tagged with run_id), flush when full
+    # ---------------------------------------------------------
+    def append(self, records, run_id):
+        with self._lock:
+            for record in records:
+                record = {**record, "run_id": run_id}
+                self._buffer.append(json.dumps(record, ensure_ascii=False))
+
+            if len(self._buffer) >= self.flush_every:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._buffer:
+            return
+
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(self._buffer) + "\n")
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+        self._buffer = []
+
+    # ---------------------------------------------------------
+    # Yield lines from the end of the file, block by block
+    # ---------------------------------------------------------
+    def _reversed_lines(self):
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+
+        with f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            remainder = b""
+
+            while position > 0:
+                size = min(self.BLOCK_SIZE, position)
+                position -= size
+                f.seek(position)
+                lines = (f.read(size) + remainder).split(b"\n")
+
+                # First piece may be a partial line: keep it for next block
+                remainder = lines.pop(0)
+                for line in reversed(lines):
+                    if line.strip():
+                        yield line.decode("utf-8")
+
+            if remainder.strip():
+                yield remainder.decode("utf-8")
+
+    def _reversed_records(self):
+        for line in self._reversed_lines():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # Torn last line after a crash: skip it
+                continue
+
+    # ---------------------------------------------------------
+    # Last `limit` records, oldest first
+    # ---------------------------------------------------------
+    def tail(self, limit):
+        self.flush()
+
+        records = []
+        for record in self._reversed_records():
+            if len(records) >= limit:
+                break
+            records.append(record)
+
+        records.reverse()
+        return records
+
+    # ---------------------------------------------------------
+    # Records of the most recent run (optionally its last `limit`).
+    # Runs can interleave in the log (bot chats running at once), so
+    # every record of that run inside the last LAST_RUN_WINDOW is kept.
+    # ---------------------------------------------------------
+    def last_run(self, limit=None):
+        self.flush()
+
+        records = []
+        run_id = None
+        for scanned, record in enumerate(self._reversed_records()):
+            if scanned >= self.LAST_RUN_WINDOW:
+                break
+            if run_id is None:
+                run_id = record.get("run_id")
+            if record.get("run_id") != run_id:
+                continue
+
+            records.append(record)
+            if limit is not None and len(records) >= limit:
+                break
+
+        records.reverse()
+        return records
@@ -0,0 +1,225 @@
+# src/similarity_cache.py
+
+import os
+import re
+import json
+import time
+import zlib
+import random
+import sqlite3
+import threading
+
+from .utils import env_int
+
+# Words that don't change what a prompt asks for
+STOPWORDS = {
+    "a", "an", "the", "of", "to", "for", "in", "on", "about", "and", "or",
+    "is", "are", "was", "be", "what", "s", "me", "please", "can", "you",
+}
+
+_PRIME = (1 << 61) - 1
+
+
+def normalize(text):
+    """Lowercase words without punctuation and stopwords."""
+    return [w for w in re.findall(r"\w+", text.lower()) if w not in STOPWORDS]
+
+
+def shingles(text):
+    """Word unigrams + bigrams of the normalized prompt (bigrams keep word order)."""
+    words = normalize(text)
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def jaccard(a, b):
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class SimilarityCache:
+    """
+    Near-duplicate prompt cache: prompts are MinHash-signed and indexed in
+    an LSH table (bands of the signature), so similar prompts are found
+    without comparing against every entry. A candidate must use exactly
+    the same content words (one changed word, e.g. "French" → "German",
+    is a different request however long the prompt) and reach the exact
+    Jaccard similarity `threshold` on shingles (word order).
+    Entries live in SQLite; the index is rebuilt in memory on start.
+    `scope` (model + generation params) must match for a hit.
+    """
+
+    EVICT_EVERY = 100   # run eviction every N writes
+
+    def __init__(self, path="data/similarity_cache.sqlite3", threshold=0.85,
+                 num_perm=64, bands=16, ttl=7 * 24 * 3600, max_items=10000):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+
+        self.path = path
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.ttl = ttl
+        self.max_items = max_items
+
+        self.hits = 0
+        self.misses = 0
+
+        # Fixed seed: signatures stay comparable across processes and runs
+        rng = random.Random(1)
+        self._perms = [
+            (rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)
+        ]
+
+        self._entries = {}   # id -> (scope, prompt, signature, created)
+        self._buckets = {}   # (band, band hash) -> set of ids
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS prompts ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " scope TEXT NOT NULL,"
+            " prompt TEXT NOT NULL,"
+            " signature TEXT NOT NULL,"
+            " response TEXT NOT NULL,"
+            " created REAL NOT NULL)"
+        )
+        self._db.commit()
+        self._load()
+
+    # ---------------------------------------------------------
+    # Build the cache from .env (None when disabled)
+    # ---------------------------------------------------------
+    @classmethod
+    def from_env(cls):
+        if os.getenv("SIMILARITY_CACHE", "false").lower() != "true":
+            return None
+
+        return cls(
+            path=os.getenv("SIMILARITY_CACHE_PATH", "data/similarity_cache.sqlite3"),
+            threshold=float(os.getenv("SIMILARITY_THRESHOLD", "0.85")),
+            ttl=env_int("SIMILARITY_CACHE_TTL", 7 * 24 * 3600),
+            max_items=env_int("SIMILARITY_CACHE_ITEMS", 10000),
+        )
+
+    # ---------------------------------------------------------
+    # MinHash signature + LSH band keys
+    # ---------------------------------------------------------
+    def signature(self, shingle_set):
+        hashes = [zlib.crc32(s.encode("utf-8")) for s in shingle_set] or [0]
+        return [min((a * h + b) % _PRIME for h in hashes) for a, b in self._perms]
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            start = band * self.rows
+            yield band, hash(tuple(signature[start:start + self.rows]))
+
+    def _index(self, entry_id, scope, prompt, signature, created):
+        self._entries[entry_id] = (scope, prompt, signature, created)
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, set()).add(entry_id)
+
+    def _unindex(self, entry_id):
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        for key in self._band_keys(entry[2]):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def _load(self):
+        rows = self._db.execute("SELECT id, scope, prompt, signature, created FROM prompts")
+        for entry_id, scope, prompt, signature, created in rows:
+            if not self._expired(created):
+                self._index(entry_id, scope, prompt, json.loads(signature), created)
+
+    def _expired(self, created):
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    # ---------------------------------------------------------
+    # Lookup → (response, matched prompt, score) or None
+    # ---------------------------------------------------------
+    def get(self, prompt, scope=""):
+        query = shingles(prompt)
+        words = set(normalize(prompt))
+        signature = self.signature(query)
+
+        with self._lock:
+            candidates = set()
+            for key in self._band_keys(signature):
+                candidates |= self._buckets.get(key, set())
+
+            best, best_score = None, 0.0
+            for entry_id in candidates:
+                entry_scope, entry_prompt, _, created = self._entries[entry_id]
+                if entry_scope != scope or self._expired(created):
+                    continue
+                if set(normalize(entry_prompt)) != words:
+                    continue
+                score = jaccard(query, shingles(entry_prompt))
+                if score >= self.threshold and score > best_score:
+                    best, best_score = entry_id, score
+
+            if best is None:
+                self.misses += 1
+                return None
+
+            row = self._db.execute("SELECT response FROM prompts WHERE id = ?", (best,)).fetchone()
+            if row is None:
+                self._unindex(best)
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return row[0], self._entries[best][1], round(best_score, 3)
+
+    # ---------------------------------------------------------
+    # Store a prompt + its response
+    # ---------------------------------------------------------
+    def set(self, prompt, response, scope=""):
+        signature = self.signature(shingles(prompt))
+        now = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO prompts (scope, prompt, signature, response, created)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (scope, prompt, json.dumps(signature), response, now),
+            )
+            self._index(cursor.lastrowid, scope, prompt, signature, now)
+            self._writes += 1
+            if self._writes % self.EVICT_EVERY == 0:
+                self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        """Drop expired entries, then the oldest ones above max_items."""
+        by_age = sorted(self._entries, key=lambda i: self._entries[i][3])
+        stale = {i for i in by_age if self._expired(self._entries[i][3])}
+        live = [i for i in by_age if i not in stale]
+        stale.update(live[:max(0, len(live) - self.max_items)])
+
+        for entry_id in stale:
+            self._unindex(entry_id)
+        self._db.executemany("DELETE FROM prompts WHERE id = ?", [(i,) for i in stale])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self._db.execute("DELETE FROM prompts")
+            self._db.commit()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "items": len(self._entries)}
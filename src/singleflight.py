@@ -0,0 +1,64 @@
+# src/singleflight.py
+
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """
+    In-flight request coalescing: while a call for `key` is running,
+    other threads asking for the same key wait for it and share its
+    result (or its exception) instead of starting their own call.
+    """
+
+    # Result of a leader that stopped before finishing (closed stream):
+    # its followers don't get a partial answer, they run the call again
+    ABANDONED = object()
+
+    def __init__(self):
+        self._calls = {}   # key -> Future of the running call
+        self._lock = threading.Lock()
+
+    def begin(self, key):
+        """→ (future, leader). The leader must call finish() exactly once."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+
+            future = Future()
+            self._calls[key] = future
+            return future, True
+
+    def finish(self, key, future, result=None, error=None):
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key, fn):
+        """Run fn() once per key at a time → (result, shared)."""
+        while True:
+            future, leader = self.begin(key)
+            if leader:
+                break
+            result = future.result()
+            if result is not self.ABANDONED:
+                return result, True
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self.finish(key, future, error=e)
+            raise
+
+        self.finish(key, future, result)
+        return result, False
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
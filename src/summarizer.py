@@ -1,43 +1,81 @@
 # summarizer.py
 # This class will summarize generated text and compare with the prompt.
 
+import threading
+
 from transformers import T5Tokenizer, T5ForConditionalGeneration
 import torch
 
 class Summarizer:
 
-    def __init__(self, model_name="t5-small"):
+    def __init__(self, model_name="t5-small", num_beams=4, batch_size=8, quantize=False):
         self.model_name = model_name
+        self.num_beams = num_beams
+        self.batch_size = batch_size
+        self.quantize = quantize
         self.tokenizer = None
         self.model = None
+        self._load_lock = threading.Lock()
 
     def load(self):
-        print(f"Loading summarization model: {self.model_name} ...")
-        self.tokenizer = T5Tokenizer.from_pretrained(self.model_name)
-        self.model = T5ForConditionalGeneration.from_pretrained(self.model_name)
-        print("Summarizer loaded successfully.")
+        with self._load_lock:
+            if self.model is not None and self.tokenizer is not None:
+                return
+
+            print(f"Loading summarization model: {self.model_name} ...")
+            tokenizer = T5Tokenizer.from_pretrained(self.model_name)
+            model = T5ForConditionalGeneration.from_pretrained(self.model_name)
+            model.eval()
+
+            # int8 dynamic quantization of the Linear layers (CPU only)
+            if self.quantize:
+                model = torch.quantization.quantize_dynamic(
+                    model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+
+            self.tokenizer = tokenizer
+            self.model = model
+            print("Summarizer loaded successfully.")
 
     def summarize(self, text):
-        if self.model is None or self.tokenizer is None:
-            raise RuntimeError("Summarizer not loaded. Call .load() first.")
-
-        # T5 expects a "summarize:" prefix
-        input_text = "summarize: " + text
-
-        inputs = self.tokenizer(
-            input_text,
-            return_tensors="pt",
-            padding=True,
-            truncation=True
-        )
-
-        summary_ids = self.model.generate(
-            inputs.input_ids,
-            max_length=60,
-            min_length=10,
-            length_penalty=1.0,
-            num_beams=4,
-            early_stopping=True
-        )
-
-        return self.tokenizer.decode(summary_ids[0], skip_special_tokens=True)
+        return self.summarize_many([text])[0]
+
+    def summarize_many(self, texts):
+        """
+        Summarize a list of texts in padded mini-batches.
+        Loads the model on first use.
+        """
+        self.load()
+
+        # Sort by length so each mini-batch pads as little as possible
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        summaries = [None] * len(texts)
+
+        for start in range(0, len(order), self.batch_size):
+            indices = order[start:start + self.batch_size]
+
+            # T5 expects a "summarize:" prefix
+            inputs = self.tokenizer(
+                ["summarize: " + texts[i] for i in indices],
+                return_tensors="pt",
+                padding=True,
+                truncation=True,
+                max_length=512
+            )
+
+            with torch.no_grad():
+                summary_ids = self.model.generate(
+                    inputs.input_ids,
+                    attention_mask=inputs.attention_mask,
+                    max_length=60,
+                    min_length=10,
+                    length_penalty=1.0,
+                    num_beams=self.num_beams,
+                    early_stopping=self.num_beams > 1
+                )
+
+            decoded = self.tokenizer.batch_decode(summary_ids, skip_special_tokens=True)
+            for i, summary in zip(indices, decoded):
+                summaries[i] = summary
+
+        return summaries
@@ -1,10 +1,22 @@
 import json
+import os
 
 def save_json(path, data):
     """Save data to JSON file."""
     with open(path, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=4, ensure_ascii=False)
 
+def env_int(name, default=None):
+    """Read an integer from the environment (empty / missing -> default)."""
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return int(value)
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token), no tokenizer needed."""
+    return max(1, len(text) // 4)
+
 def load_default_prompts():
     return [
         "Write a motivational message for students who love AI.",
@@ -0,0 +1,20 @@
+from src.pipeline import ContentPipeline
+
+
+def test_local_batch_backend_runs_without_api_key(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setenv("RESULTS_PATH", str(tmp_path / "results.jsonl"))
+
+    csv_path = tmp_path / "prompts.csv"
+    csv_path.write_text("prompt\nWrite a haiku\nDescribe a chair\n", encoding="utf-8")
+
+    pipeline = ContentPipeline(use_api=False, summarize=False)
+    results = pipeline.run_batch_api(str(csv_path), backend="local", poll_interval=0)
+
+    assert [r["prompt"] for r in results] == ["Write a haiku", "Describe a chair"]
+    assert all(r["error"] is None for r in results)
+    assert results[0]["generated_text"] == "[LOCAL BATCH] Write a haiku"
+    assert results[0]["batch_id"].startswith("batch_local_")
+    # The offline path never builds a generator
+    assert pipeline._generator is None
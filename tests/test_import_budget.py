@@ -0,0 +1,9 @@
+import pytest
+
+from benchmarks.import_budget import MODULES, measure
+
+
+@pytest.mark.parametrize("module", MODULES)
+def test_import_pulls_in_no_heavy_backend(module):
+    # Time is left to benchmarks/import_budget.py (machine dependent)
+    assert measure(module)["heavy"] == []
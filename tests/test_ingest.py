@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+from src.pipeline import ContentPipeline
+
+
+class FlakyGenerator:
+    """Fails the prompts listed in `failing` (once each)."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.prompts = []
+
+    def generate(self, prompt, info=None):
+        self.prompts.append(prompt)
+        if prompt in self.failing:
+            self.failing.discard(prompt)
+            raise ConnectionError("boom")
+        return f"answer to {prompt}"
+
+
+@pytest.fixture
+def csv_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("RESULTS_PATH", str(tmp_path / "results.jsonl"))
+    path = tmp_path / "prompts.csv"
+    path.write_text("prompt\n" + "".join(f"prompt {i}\n" for i in range(10)), encoding="utf-8")
+    return str(path)
+
+
+def make_pipeline(generator):
+    pipeline = ContentPipeline(use_api=False, summarize=False, max_workers=2)
+    pipeline._generator = generator
+    pipeline.models_loaded = True
+    return pipeline
+
+
+def test_resume_retries_failed_rows_of_finished_chunks(csv_path):
+    pipeline = make_pipeline(FlakyGenerator(failing={"prompt 3"}))
+
+    # Interrupted after the first two chunks (rows 0-7); row 3 failed
+    stream = pipeline.iter_batch_csv(csv_path, chunk_size=4)
+    first = [next(stream) for _ in range(8)]
+    stream.close()
+    assert [r["row"] for r in first if r["error"]] == [3]
+
+    resumed = list(pipeline.iter_batch_csv(csv_path, chunk_size=4))
+
+    assert [r["row"] for r in resumed] == [3, 8, 9]
+    assert all(r["error"] is None for r in resumed)
+
+
+def test_failed_rows_are_retried_after_a_complete_run(csv_path):
+    pipeline = make_pipeline(FlakyGenerator(failing={"prompt 5"}))
+
+    assert len(list(pipeline.iter_batch_csv(csv_path, chunk_size=4))) == 10
+
+    retried = list(pipeline.iter_batch_csv(csv_path, chunk_size=4))
+    assert [(r["row"], r["error"]) for r in retried] == [(5, None)]
+
+
+def test_edited_csv_is_not_resumed(csv_path):
+    pipeline = make_pipeline(FlakyGenerator())
+
+    stream = pipeline.iter_batch_csv(csv_path, chunk_size=4)
+    [next(stream) for _ in range(4)]
+    stream.close()
+
+    with open(csv_path, "a", encoding="utf-8") as f:
+        f.write("prompt 10\n")
+    stat = os.stat(csv_path)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+    rows = [r["row"] for r in pipeline.iter_batch_csv(csv_path, chunk_size=4)]
+    assert rows == list(range(11))
@@ -0,0 +1,50 @@
+import threading
+import time
+
+import pytest
+
+from src.job_queue import JobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "queue.sqlite3"), visibility_timeout=1, wait_timeout=0.3)
+
+
+def test_unclaimed_job_is_cancelled_after_the_timeout(queue):
+    job_id = queue.enqueue("single", {"prompt": "x"})
+
+    job = queue.wait_or_cancel(job_id, poll_interval=0.05)
+
+    assert job["status"] == "failed"
+    assert "no worker" in job["error"]
+    assert queue.claim("w1") is None
+
+
+def test_running_job_with_a_live_lease_is_waited_for(queue):
+    job_id = queue.enqueue("single", {"prompt": "x"})
+    queue.claim("w1")
+
+    def long_job():
+        # Runs well past wait_timeout, renewing its lease
+        for _ in range(6):
+            time.sleep(0.2)
+            queue.heartbeat(job_id, "w1")
+        queue.complete(job_id, "w1", [{"generated_text": "done"}])
+
+    worker = threading.Thread(target=long_job)
+    worker.start()
+    job = queue.wait_or_cancel(job_id, poll_interval=0.05)
+    worker.join()
+
+    assert job["status"] == "done"
+    assert job["result"] == [{"generated_text": "done"}]
+
+
+def test_job_whose_worker_died_is_cancelled(queue):
+    job_id = queue.enqueue("single", {"prompt": "x"})
+    queue.claim("w1")   # lease runs out after 1s, nobody renews it
+
+    job = queue.wait_or_cancel(job_id, poll_interval=0.05)
+
+    assert job["status"] == "failed"
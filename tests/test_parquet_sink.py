@@ -0,0 +1,53 @@
+import datetime
+import os
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from src.parquet_sink import ParquetSink
+
+
+def record(i, flagged=False):
+    return {
+        "prompt": f"prompt {i}",
+        "generated_text": f"answer {i}",
+        "flagged": flagged,
+        "flagged_words": ["kill"] if flagged else [],
+        "timestamp": datetime.datetime.now().isoformat(),
+    }
+
+
+def parquet_files(folder):
+    return [f for _, _, files in os.walk(folder) for f in files if f.endswith(".parquet")]
+
+
+def test_single_prompts_are_buffered_into_one_file(tmp_path):
+    sink = ParquetSink(str(tmp_path / "pq"), flush_every=3)
+
+    sink.add([record(0)], "r0")
+    sink.add([record(1)], "r1")
+    assert parquet_files(sink.folder) == []
+
+    sink.add([record(2)], "r2")
+    assert len(parquet_files(sink.folder)) == 1
+    assert sink.query().num_rows == 3
+
+
+def test_query_sees_buffered_rows(tmp_path):
+    sink = ParquetSink(str(tmp_path / "pq"), flush_every=100)
+    sink.add([record(0, flagged=True)], "r0")
+
+    assert sink.query(columns=["prompt"], flagged=True).column("prompt").to_pylist() == ["prompt 0"]
+
+
+def test_compact_merges_partition_files(tmp_path):
+    sink = ParquetSink(str(tmp_path / "pq"))
+    for i in range(4):
+        sink.write([record(i)], f"r{i}")
+    assert len(parquet_files(sink.folder)) == 4
+
+    assert sink.compact() == 3
+
+    assert len(parquet_files(sink.folder)) == 1
+    assert sorted(sink.query().column("prompt").to_pylist()) == [f"prompt {i}" for i in range(4)]
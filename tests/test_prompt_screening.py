@@ -0,0 +1,51 @@
+from src.pipeline import ContentPipeline
+
+
+class LocalShapedGenerator:
+    """Same call shape as LocalGenerator: has .model, no model= kwarg."""
+
+    model = object()
+
+    def generate(self, prompt, info=None):
+        return f"story: {prompt}"
+
+
+class RoutingGenerator:
+    supports_model_override = True
+    model = "main-model"
+
+    def __init__(self):
+        self.models = []
+
+    def generate(self, prompt, model=None, info=None):
+        self.models.append(model)
+        return "ok"
+
+
+def make_pipeline(tmp_path, monkeypatch, generator):
+    monkeypatch.setenv("RESULTS_PATH", str(tmp_path / "results.jsonl"))
+    pipeline = ContentPipeline(use_api=False, summarize=False, prompt_policy="route")
+    pipeline._generator = generator
+    pipeline.models_loaded = True
+    return pipeline
+
+
+def test_route_falls_back_to_flag_for_local_generator(tmp_path, monkeypatch):
+    pipeline = make_pipeline(tmp_path, monkeypatch, LocalShapedGenerator())
+
+    result = pipeline.process_single("a story about a bomb")[0]
+
+    assert result["error"] is None
+    assert result["generated_text"] == "story: a story about a bomb"
+    assert result["prompt_screening"]["decision"] == "flag"
+    assert result["flagged"] is True
+
+
+def test_route_switches_model_when_supported(tmp_path, monkeypatch):
+    generator = RoutingGenerator()
+    pipeline = make_pipeline(tmp_path, monkeypatch, generator)
+
+    result = pipeline.process_single("a story about a bomb")[0]
+
+    assert result["prompt_screening"]["decision"] == "route"
+    assert generator.models == [pipeline.route_model]
@@ -0,0 +1,41 @@
+import pytest
+
+from src.similarity_cache import SimilarityCache
+
+CHAIR = (
+    "Write a detailed product description for an ergonomic office chair with lumbar "
+    "support, adjustable armrests, breathable mesh and a five year warranty in {}"
+)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SimilarityCache(path=str(tmp_path / "similar.sqlite3"))
+
+
+def test_paraphrase_is_a_hit(cache):
+    cache.set("Explain quantum computing for kids.", "answer")
+
+    hit = cache.get("explain quantum computing to kids")
+
+    assert hit is not None
+    assert hit[0] == "answer"
+
+
+def test_different_audience_is_a_miss(cache):
+    cache.set("Explain quantum computing for kids.", "answer")
+
+    assert cache.get("Explain quantum computing for adults.") is None
+
+
+def test_different_language_in_long_prompt_is_a_miss(cache):
+    cache.set(CHAIR.format("French"), "texte")
+
+    assert cache.get(CHAIR.format("German")) is None
+    assert cache.get(CHAIR.format("French")) is not None
+
+
+def test_scope_must_match(cache):
+    cache.set("Explain quantum computing for kids.", "answer", scope="model-a")
+
+    assert cache.get("explain quantum computing to kids", scope="model-b") is None
@@ -0,0 +1,38 @@
+from src.pipeline import ContentPipeline
+
+
+class EchoGenerator:
+    def generate(self, prompt, info=None):
+        return f"answer to {prompt}"
+
+
+class BrokenSummarizer:
+    batch_size = 2
+
+    def __init__(self):
+        self.calls = 0
+
+    def summarize_many(self, texts):
+        self.calls += 1
+        if self.calls == 1:
+            raise OSError("model weights missing")
+        return [f"summary of {t}" for t in texts]
+
+
+def test_summarizer_failure_keeps_the_results(tmp_path, monkeypatch):
+    monkeypatch.setenv("RESULTS_PATH", str(tmp_path / "results.jsonl"))
+    pipeline = ContentPipeline(use_api=False, summarize=True)
+    pipeline._generator = EchoGenerator()
+    pipeline._summarizer = BrokenSummarizer()
+    pipeline.models_loaded = True
+
+    results = pipeline._summarize(pipeline._process_many(["a", "b", "c"]))
+
+    # First mini-batch failed, the second one still got summaries
+    assert [r["summary"] for r in results] == [None, None, "summary of answer to c"]
+    assert results[0]["summary_error"]["type"] == "OSError"
+    assert "summary_error" not in results[2]
+    assert all(r["generated_text"] for r in results)
+
+    single = pipeline.process_single("d")
+    assert single[0]["generated_text"] == "answer to d"